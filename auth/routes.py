@@ -6,6 +6,7 @@ from auth.utils import (
     create_access_token,
     get_current_user,
 )
+from fastapi.concurrency import run_in_threadpool
 from config import users_collection
 
 router = APIRouter(prefix="/api/auth", tags=["Auth"])
@@ -15,7 +16,7 @@ class LoginRequest(BaseModel):
     password: str
 
 @router.post("/register")
-def register(
+async def register(
     email: str = Form(...),
     password: str = Form(...),
     role: str = Form(...),  # "candidate" or "recruiter"
@@ -25,11 +26,11 @@ def register(
         raise HTTPException(status_code=400, detail="Invalid role. Must be 'candidate' or 'recruiter'.")
 
     # Check if user already exists
-    if users_collection.find_one({"email": email}):
+    if await users_collection.find_one({"email": email}):
         raise HTTPException(status_code=400, detail="User already exists")
 
-    # Hash password
-    hashed_pw = get_password_hash(password)
+    # Hash password (argon2 is deliberately slow, keep it off the event loop)
+    hashed_pw = await run_in_threadpool(get_password_hash, password)
 
     # Insert user record
     user_doc = {
@@ -37,7 +38,7 @@ def register(
         "password": hashed_pw,
         "role": role,
     }
-    users_collection.insert_one(user_doc)
+    await users_collection.insert_one(user_doc)
 
     return {"message": "User registered successfully", "email": email, "role": role}
 
@@ -45,12 +46,12 @@ def register(
 
 
 @router.post("/login")
-def login(
+async def login(
     email: str = Form(...),
     password: str = Form(...),
 ):
-    user = users_collection.find_one({"email": email})
-    if not user or not verify_password(password, user["password"]):
+    user = await users_collection.find_one({"email": email})
+    if not user or not await run_in_threadpool(verify_password, password, user["password"]):
         raise HTTPException(status_code=401, detail="Invalid email or password")
 
     token = create_access_token({
@@ -32,7 +32,7 @@ def create_access_token(user: dict) -> str:
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
-def get_current_user(token: str = Depends(oauth2_scheme)):
+async def get_current_user(token: str = Depends(oauth2_scheme)):
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         user_id = payload.get("user_id")
@@ -41,7 +41,7 @@ def get_current_user(token: str = Depends(oauth2_scheme)):
         if not user_id or not email:
             raise HTTPException(status_code=401, detail="Invalid token payload")
 
-        user = users_collection.find_one({"_id": ObjectId(user_id), "email": email})
+        user = await users_collection.find_one({"_id": ObjectId(user_id), "email": email})
         if not user:
             raise HTTPException(status_code=401, detail="User not found")
 
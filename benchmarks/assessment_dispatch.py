@@ -0,0 +1,120 @@
+"""
+Per-application cost of dispatching the apply-time resume assessment.
+
+Compares the old loopback (requests.post to /api/resume/assess-candidate on
+this same process, via the threadpool) with calling run_candidate_assessment
+directly. The assessment itself is replaced by a fixed result (optionally
+sleeping --work-ms) so only the dispatch overhead is measured; no MongoDB or
+Gemini access is needed.
+
+    python -m benchmarks.assessment_dispatch [--applications 200] [--concurrency 16] [--work-ms 0]
+"""
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import time
+
+os.environ.setdefault("GOOGLE_API_KEY", "benchmark")
+os.environ.setdefault("SARVAM_API_KEY", "benchmark")
+
+import requests
+import uvicorn
+from bson import ObjectId
+from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
+
+import controllers.job_controller as job_controller
+import controllers.resume_assessment_controller as resume_assessment_controller
+
+
+def _install_fake_assessment(work_ms: float):
+    async def fake_run_candidate_assessment(resume_id, job_id, force=False, priority="default"):
+        if work_ms:
+            await asyncio.sleep(work_ms / 1000)
+        return {"message": "Assessment completed", "assessment_id": str(ObjectId()), "assessment": {}, "cached": False}
+
+    resume_assessment_controller.run_candidate_assessment = fake_run_candidate_assessment
+    job_controller.run_candidate_assessment = fake_run_candidate_assessment
+    # Status writes are not what is being compared
+    job_controller.queue_application_update = lambda application_id, fields: None
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def _loopback_dispatch(url: str, application_id: str, resume_id: str, job_id: str):
+    # What assess_candidate_background used to do
+    response = await run_in_threadpool(
+        requests.post, url, json={"resume_id": resume_id, "job_id": job_id, "priority": "batch"}
+    )
+    if response.status_code == 200:
+        response.json()
+
+
+async def _direct_dispatch(url: str, application_id: str, resume_id: str, job_id: str):
+    await job_controller.assess_candidate_background(application_id, resume_id, job_id)
+
+
+async def _measure(dispatch, url: str, applications: int, concurrency: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one():
+        async with semaphore:
+            started = time.perf_counter()
+            await dispatch(url, str(ObjectId()), str(ObjectId()), str(ObjectId()))
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(applications)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "mean_ms": statistics.fmean(latencies),
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1],
+        "per_second": applications / elapsed,
+    }
+
+
+async def main(applications: int, concurrency: int, work_ms: float):
+    _install_fake_assessment(work_ms)
+
+    # Serve the real handler on this event loop, as the loopback did
+    app = FastAPI()
+    app.post("/api/resume/assess-candidate")(resume_assessment_controller.assess_candidate)
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    serve_task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    url = f"http://127.0.0.1:{port}/api/resume/assess-candidate"
+
+    try:
+        results = {}
+        for name, dispatch in (("loopback", _loopback_dispatch), ("direct", _direct_dispatch)):
+            await _measure(dispatch, url, min(applications, 20), concurrency)  # warm up
+            results[name] = await _measure(dispatch, url, applications, concurrency)
+    finally:
+        server.should_exit = True
+        await serve_task
+
+    print(f"{applications} applications, concurrency {concurrency}, simulated assessment {work_ms} ms")
+    print(f"{'dispatch':<10} {'mean ms':>10} {'p95 ms':>10} {'apps/s':>10}")
+    for name, r in results.items():
+        print(f"{name:<10} {r['mean_ms']:>10.2f} {r['p95_ms']:>10.2f} {r['per_second']:>10.1f}")
+    saved = results["loopback"]["mean_ms"] - results["direct"]["mean_ms"]
+    print(f"saved per application: {saved:.2f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--applications", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--work-ms", type=float, default=0.0)
+    args = parser.parse_args()
+    asyncio.run(main(args.applications, args.concurrency, args.work_ms))
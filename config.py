@@ -1,22 +1,44 @@
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 from fastapi import FastAPI
-import pymongo
-from google import genai
+from pymongo import AsyncMongoClient, read_preferences
+import inspect
 import os
 # main.py
 
 from fastapi.middleware.cors import CORSMiddleware
+from utils.mongo_pool import pool_listener
 
 
 
 # Load environment variables
 load_dotenv()
 
-# Configure Gemini API
-client = genai.Client()
+# Gemini and Sarvam clients are built in services/providers.py (live/record/replay)
 
 
-app = FastAPI(title="AI Interview Platform API")
+# Coroutine functions awaited at startup; callables (or coroutine functions) run at shutdown (registered in main.py)
+startup_hooks = []
+shutdown_hooks = []
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # The Mongo client is created here, inside the worker's event loop, not at import
+    connect_mongo()
+    try:
+        for hook in startup_hooks:
+            await hook()
+        yield
+    finally:
+        for hook in shutdown_hooks:
+            result = hook()
+            if inspect.isawaitable(result):
+                await result
+        await close_mongo()
+
+
+app = FastAPI(title="AI Interview Platform API", lifespan=lifespan)
 
 origins = ["*"]
 
@@ -26,21 +48,100 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],    # allow all methods (GET, POST, etc.)
     allow_headers=["*"],    # allow all headers
+    expose_headers=["X-Next-Cursor"],  # keyset pagination cursor (utils/pagination.py)
 )
 
 
 # MongoDB connection string from environment
 MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017")
-mongo_client = pymongo.MongoClient(MONGO_URI)
-db = mongo_client.interview_platform
-users_collection = db.users
-resumes_collection = db.resumes
-assessments_collection = db.assessments    #resume assessment
-jds_collection = db.jds
-interviews_collection = db.interviews
-applications_collection = db.applications
-interview_assessments_collection = db.interviews_assessment
-
-users_collection.create_index("email", unique=True)
+MONGO_DB_NAME = os.getenv("MONGO_DB_NAME", "interview_platform")
+
+# Pool and timeout settings; unset values keep the driver defaults
+_MONGO_CLIENT_OPTIONS = {
+    "maxPoolSize": "MONGO_MAX_POOL_SIZE",
+    "minPoolSize": "MONGO_MIN_POOL_SIZE",
+    "maxIdleTimeMS": "MONGO_MAX_IDLE_TIME_MS",
+    "waitQueueTimeoutMS": "MONGO_WAIT_QUEUE_TIMEOUT_MS",
+    "serverSelectionTimeoutMS": "MONGO_SERVER_SELECTION_TIMEOUT_MS",
+    "connectTimeoutMS": "MONGO_CONNECT_TIMEOUT_MS",
+    "socketTimeoutMS": "MONGO_SOCKET_TIMEOUT_MS",
+}
+
+# Read preference for list/dashboard reads (e.g. "secondaryPreferred"); see list_reads()
+MONGO_LIST_READ_PREFERENCE = os.getenv("MONGO_LIST_READ_PREFERENCE", "primary")
+_list_read_preference = read_preferences.make_read_preference(
+    read_preferences.read_pref_mode_from_name(MONGO_LIST_READ_PREFERENCE), None
+)
+
+_mongo_client = None
+
+
+def connect_mongo() -> AsyncMongoClient:
+    """Returns this process's client, creating it on first use (the lifespan creates it at startup)."""
+    global _mongo_client
+    if _mongo_client is None:
+        options = {key: int(os.environ[env]) for key, env in _MONGO_CLIENT_OPTIONS.items() if os.getenv(env)}
+        # Native asyncio driver: every collection method is awaited on the event loop
+        _mongo_client = AsyncMongoClient(MONGO_URI, event_listeners=[pool_listener], **options)
+        pool_listener.max_pool_size = _mongo_client.options.pool_options.max_pool_size
+    return _mongo_client
+
+
+async def close_mongo():
+    global _mongo_client
+    if _mongo_client is not None:
+        client, _mongo_client = _mongo_client, None
+        await client.close()
+
+
+class _LazyClient:
+    def __getattr__(self, attr):
+        return getattr(connect_mongo(), attr)
+
+
+class _LazyDatabase:
+    def __init__(self, name: str):
+        self.name = name
+
+    def __getattr__(self, attr):
+        return getattr(connect_mongo()[self.name], attr)
+
+    def __getitem__(self, collection: str):
+        return connect_mongo()[self.name][collection]
+
+
+class _LazyCollection:
+    """
+    Module-level stand-in for a collection so `from config import x_collection`
+    works without a client existing at import time; every attribute access is
+    forwarded to the collection on the current client.
+    """
+
+    def __init__(self, database: _LazyDatabase, name: str):
+        self.database = database
+        self.name = name
+
+    def __getattr__(self, attr):
+        return getattr(connect_mongo()[self.database.name][self.name], attr)
+
+
+def list_reads(collection):
+    """`collection` with MONGO_LIST_READ_PREFERENCE applied, for list endpoints that tolerate replica lag."""
+    if _list_read_preference == read_preferences.ReadPreference.PRIMARY:
+        return collection
+    return collection.with_options(read_preference=_list_read_preference)
+
+
+mongo_client = _LazyClient()
+db = _LazyDatabase(MONGO_DB_NAME)
+users_collection = _LazyCollection(db, "users")
+resumes_collection = _LazyCollection(db, "resumes")
+assessments_collection = _LazyCollection(db, "assessments")    #resume assessment
+jds_collection = _LazyCollection(db, "jds")
+interviews_collection = _LazyCollection(db, "interviews")
+applications_collection = _LazyCollection(db, "applications")
+interview_assessments_collection = _LazyCollection(db, "interviews_assessment")
+resume_parse_cache_collection = _LazyCollection(db, "resume_parse_cache")
+resume_ingest_jobs_collection = _LazyCollection(db, "resume_ingest_jobs")
 
 
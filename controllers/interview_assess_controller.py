@@ -4,15 +4,16 @@ from bson import ObjectId
 from google import genai
 from pydantic import BaseModel
 from typing import List, Optional
-from utils.pymango_wrappers import async_insert_one,async_find_one 
 from config import resumes_collection, assessments_collection, jds_collection, interview_assessments_collection, applications_collection, interviews_collection
-from config import client
+from services.llm_gateway import generate_structured, send_chat_message, stream_chat_message
+from services.interview_session import start_session, get_session, answer_and_ask
+from services.prompt_context import build_prompt_context
+from services.jd_cache import get_cached_jd
 from bson import json_util
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from bson import json_util  
 import json
 import time
-from json_repair import repair_json
 
 
 class ChatTurn(BaseModel):
@@ -127,16 +128,16 @@ async def assess_candidate_interview(request: AssessCandidateInterviewRequest):
         raise HTTPException(status_code=400, detail="Invalid application_id")
 
     # Fetch job description and resume
-    job_desc_doc = jds_collection.find_one({"_id": ObjectId(request.job_id)})
+    job_desc_doc = await get_cached_jd(request.job_id)
     if not job_desc_doc:
         raise HTTPException(status_code=404, detail="Job description not found")
     
-    resume_doc = resumes_collection.find_one({"_id": ObjectId(request.resume_id)})
+    resume_doc = await resumes_collection.find_one({"_id": ObjectId(request.resume_id)})
     if not resume_doc:
         raise HTTPException(status_code=404, detail="Resume not found")
     
     # Fetch interview data (video analysis + chat) from interviews_collection
-    application_doc = applications_collection.find_one({"_id": ObjectId(request.application_id)})
+    application_doc = await applications_collection.find_one({"_id": ObjectId(request.application_id)})
     if not application_doc:
         raise HTTPException(status_code=404, detail="Application not found")
     
@@ -144,7 +145,7 @@ async def assess_candidate_interview(request: AssessCandidateInterviewRequest):
     video_analysis = None
     
     if interview_id:
-        interview_doc = interviews_collection.find_one({"_id": ObjectId(interview_id)})
+        interview_doc = await interviews_collection.find_one({"_id": ObjectId(interview_id)})
         if interview_doc:
             video_analysis_data = interview_doc.get("video_analysis", {})
             video_analysis = {
@@ -152,14 +153,11 @@ async def assess_candidate_interview(request: AssessCandidateInterviewRequest):
                 "video_analysis": video_analysis_data.get("combined_video_analysis", {})
             }
 
-    # Remove internal DB fields
-    for key in ["_id", "original_filename", "raw_text"]:
-        job_desc_doc.pop(key, None)
-        resume_doc.pop(key, None)
-
-    # Use bson.json_util instead of json
-    job_desc_json = json_util.dumps(job_desc_doc)
-    resume_json = json_util.dumps(resume_doc)
+    # Compact JD + resume context (drops DB bookkeeping, empty fields, duplicates)
+    profile_context = build_prompt_context(
+        {"Job Description": job_desc_doc, "Candidate Resume": resume_doc},
+        call_site="assess_interview",
+    )
 
 
     # Prepare enhanced system prompt
@@ -239,37 +237,25 @@ Visual Analysis:
 
     # Combine all information
     contents = (
-        f"Job Description:\n{job_desc_json}\n\n"
-        f"Candidate Resume:\n{resume_json}\n\n"
+        f"{profile_context}\n\n"
         f"Difficulty Level: {request.difficulty}\n\n"
         f"Conversation History:\n{chat_history_text}\n\n"
         f"Video Analysis:\n{video_analysis_text}"
     )
 
     # Call Gemini API
-    response = client.models.generate_content(
-        model="gemini-2.5-flash",
+    # Schema-constrained output; one automatic re-ask if it still fails validation
+    assessment = await generate_structured(
+        AssessmentResult,
         contents=contents,
         config=genai.types.GenerateContentConfig(
             thinking_config=genai.types.ThinkingConfig(thinking_budget=2),
-            system_instruction=SYSTEM_PROMPT,
-            response_mime_type="application/json"
-        )
+            system_instruction=SYSTEM_PROMPT
+        ),
+        timeout=90,
+        call_site="assess_interview"
     )
 
-    print("Gemini raw response (assess_candidate):", response.text)
-
-    try:
-        repaired_json = repair_json(response.text)
-        assessment = AssessmentResult.model_validate_json(repaired_json)
-    except Exception as e:
-        print(f"Failed to parse even after repair. Raw response: {response.text}")
-        raise HTTPException(
-            status_code=500, 
-            detail=f"Failed to parse Gemini response: {str(e)}"
-        )
-        
-
     # Store the final assessment in interview_assessments_collection
     assessment_doc = {
         "application_id": ObjectId(request.application_id),
@@ -283,7 +269,7 @@ Visual Analysis:
     }
 
     # Insert final assessment
-    result = interview_assessments_collection.insert_one(assessment_doc)
+    result = await interview_assessments_collection.insert_one(assessment_doc)
     assessment_id = str(result.inserted_id)
 
     print(f"[Assessment] Stored final assessment: {assessment_id}")
@@ -312,12 +298,7 @@ class InterviewRequest(BaseModel):
     duration_seconds: int       # Elapsed interview time in seconds
 
 
-async def generate_next_question(
-    request: InterviewRequest = Body(...)
-):
-
-    client = genai.Client()
-    SYSTEM_PROMPT = """
+NEXT_QUESTION_PROMPT = """
 You are an expert technical interviewer for software engineering roles conducting a virtual interview lasting 7 minutes.
 
 Your objective is to generate one targeted, role-specific interview question per turn, using the following context:
@@ -342,10 +323,13 @@ Stop generating new questions once the 7-minute interview duration is reached.
 Respond ONLY with the next question in natural language suitable for a technical candidate.
 
 """
+
+
+def build_next_question_history(request: InterviewRequest):
     # Prepare chat history
     chat_history = [
         # System instruction
-        {"role": "model", "parts": [{"text": SYSTEM_PROMPT}]},
+        {"role": "model", "parts": [{"text": NEXT_QUESTION_PROMPT}]},
         # Provide resume+JD context to model before turns
         {"role": "user", "parts": [{"text":
             f"Candidate resume:\n{request.resume}\nJob description:\n{request.job_description}\nDifficulty: {request.difficulty}"
@@ -365,12 +349,90 @@ Respond ONLY with the next question in natural language suitable for a technical
     chat_history.append({"role": "user", "parts": [
         {"text": "Generate the next interview question for the candidate."}
     ]})
+    return chat_history
+
+
+async def generate_next_question(
+    request: InterviewRequest = Body(...)
+):
     # Create chat session and get response
-    chat = client.chats.create(model="gemini-2.5-flash", history=chat_history)
-    response = chat.send_message("Next question, please.")
+    response = await send_chat_message(
+        "Next question, please.",
+        history=build_next_question_history(request),
+        timeout=20,
+        call_site="next_question",
+        hedge=True
+    )
     return {"next_question": response.text}
 
 
+def _sse(data: dict, event: str = None) -> str:
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+
+async def stream_next_question(
+    request: InterviewRequest = Body(...)
+):
+    """
+    Server-sent events variant of generate_next_question.
+    Emits {"delta": "..."} events as Gemini generates, then a final
+    `done` event carrying {"next_question": "<full text>"}.
+    """
+    history = build_next_question_history(request)
+
+    async def events():
+        parts = []
+        try:
+            async for delta in stream_chat_message(
+                "Next question, please.",
+                history=history,
+                timeout=20,
+                call_site="next_question_stream"
+            ):
+                parts.append(delta)
+                yield _sse({"delta": delta})
+        except HTTPException as e:
+            yield _sse({"detail": e.detail}, event="error")
+            return
+        except Exception as e:
+            yield _sse({"detail": f"Next question generation failed: {str(e)}"}, event="error")
+            return
+        yield _sse({"next_question": "".join(parts)}, event="done")
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+class SessionTurnRequest(BaseModel):
+    answer: str             # Candidate's answer to the pending question
+    timestamp: str          # ISO timestamp when the answer was submitted
+    duration_seconds: int   # Elapsed interview time in seconds
+
+
+async def start_interview_session(interview_session_id: str):
+    """
+    Start the server-side session for a scheduled interview and return the first question
+    POST /api/interview/session/{interview_session_id}/start
+    """
+    session = await start_session(interview_session_id, NEXT_QUESTION_PROMPT)
+    return {"interview_session_id": interview_session_id, "next_question": session.pending_question}
+
+
+async def next_session_question(interview_session_id: str, request: SessionTurnRequest = Body(...)):
+    """
+    Submit the answer to the pending question and get the next one.
+    Only the newest answer is sent; resume, JD and prior turns live on the server.
+    POST /api/interview/session/{interview_session_id}/next-question
+    """
+    session = await get_session(interview_session_id, NEXT_QUESTION_PROMPT)
+    next_question = await answer_and_ask(session, request.answer, request.timestamp, request.duration_seconds)
+    return {"interview_session_id": interview_session_id, "next_question": next_question}
+
+
 async def get_interview_assessment(application_id: str):
     """
     Fetch complete interview assessment including chat history, video analysis, and final assessment
@@ -380,7 +442,7 @@ async def get_interview_assessment(application_id: str):
         raise HTTPException(status_code=400, detail="Invalid application_id")
     
     # Fetch application
-    application_doc = applications_collection.find_one({"_id": ObjectId(application_id)})
+    application_doc = await applications_collection.find_one({"_id": ObjectId(application_id)})
     if not application_doc:
         raise HTTPException(status_code=404, detail="Application not found")
     
@@ -398,7 +460,7 @@ async def get_interview_assessment(application_id: str):
     # Fetch interview data (chat history + video analysis)
     interview_id = application_doc.get("interview_id")
     if interview_id:
-        interview_doc = interviews_collection.find_one({"_id": ObjectId(interview_id)})
+        interview_doc = await interviews_collection.find_one({"_id": ObjectId(interview_id)})
         if interview_doc:
             response_data["interview_data"] = {
                 "interview_id": str(interview_doc["_id"]),
@@ -410,7 +472,7 @@ async def get_interview_assessment(application_id: str):
     # Fetch FINAL assessment (combined resume + interview)
     final_assessment_id = application_doc.get("final_assessment_id")
     if final_assessment_id:
-        assessment_doc = interview_assessments_collection.find_one({"_id": ObjectId(final_assessment_id)})
+        assessment_doc = await interview_assessments_collection.find_one({"_id": ObjectId(final_assessment_id)})
         if assessment_doc:
             response_data["final_assessment"] = {
                 "assessment_id": str(assessment_doc["_id"]),
@@ -431,7 +493,7 @@ async def get_assessment_summary(application_id: str):
         raise HTTPException(status_code=400, detail="Invalid application_id")
     
     # Fetch application
-    application_doc = applications_collection.find_one({"_id": ObjectId(application_id)})
+    application_doc = await applications_collection.find_one({"_id": ObjectId(application_id)})
     if not application_doc:
         raise HTTPException(status_code=404, detail="Application not found")
     
@@ -451,7 +513,7 @@ async def get_assessment_summary(application_id: str):
         })
     
     # Fetch final assessment
-    assessment_doc = interview_assessments_collection.find_one({"_id": ObjectId(final_assessment_id)})
+    assessment_doc = await interview_assessments_collection.find_one({"_id": ObjectId(final_assessment_id)})
     
     # Handle case where assessment_id exists but document is missing
     if not assessment_doc:
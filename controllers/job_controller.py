@@ -1,17 +1,27 @@
-from fastapi import FastAPI, File, UploadFile, HTTPException, Form, Query, BackgroundTasks,Path
+from fastapi import FastAPI, File, UploadFile, HTTPException, Form, Query, BackgroundTasks,Path, Body, Depends, Response, Header
+from fastapi.responses import StreamingResponse
 from bson import ObjectId
 from config import app
-from services.parsers import extract_text_from_pdf,parse_resume_with_gemini, extract_json_from_gemini_response
-from utils.pymango_wrappers import async_insert_one,async_find_one 
+from services.parsers import extract_text_from_pdf,parse_resume_with_gemini
 from config import resumes_collection
 from services.parsers import parse_jd_with_gemini
 from config import resumes_collection, jds_collection, applications_collection
 from utils.pymango_wrappers import convert_objectids
 import time
-from pymongo.errors import PyMongoError
-from typing import List
+from pymongo.errors import PyMongoError, DuplicateKeyError
+from typing import List, Literal, Optional
 from pydantic import BaseModel
-import requests
+from services.prescoring import prescore_resume, DEFAULT_PRESCORE_THRESHOLD
+from utils.uploads import spooled_pdf_upload
+from utils.pagination import PageParams, paginate, MAX_PAGE_SIZE
+from services.applicant_dashboard import job_dashboard, SORT_FIELDS
+from services.jd_cache import get_cached_jd, invalidate_jd
+from services.application_writes import queue_application_update
+from services.resume_assessment import run_candidate_assessment
+from services.llm_admission import PRIORITY_BATCH
+from services.application_events import application_event_hub, ChangeStreamsUnavailable
+import asyncio
+import json
 
 
 
@@ -20,7 +30,7 @@ async def get_jd(job_id: str):
     if not ObjectId.is_valid(job_id):
         raise HTTPException(status_code=400, detail="Invalid job ID")
 
-    job_doc = await async_find_one(jds_collection, {"_id": ObjectId(job_id)})
+    job_doc = await get_cached_jd(job_id)
     if not job_doc:
         raise HTTPException(status_code=404, detail="Job description not found")
 
@@ -42,11 +52,9 @@ async def upload_jd(
         raise HTTPException(status_code=400, detail="Only PDF files allowed")
 
     try:
-        # Read file bytes
-        pdf_bytes = await file.read()
-
-        # Extract raw text from the uploaded PDF
-        jd_text = extract_text_from_pdf(pdf_bytes)
+        # Stream the upload (size-capped, spooled to disk when large) and extract its text
+        async with spooled_pdf_upload(file) as pdf_source:
+            jd_text = await extract_text_from_pdf(pdf_source)
         if not jd_text.strip():
             raise HTTPException(status_code=400, detail="Empty PDF text extracted")
 
@@ -58,7 +66,7 @@ async def upload_jd(
         jd_data["user_id"] = ObjectId(user_id)
 
         # Insert structured JD into MongoDB
-        result = await async_insert_one(jds_collection, jd_data)
+        result = await jds_collection.insert_one(jd_data)
 
         return {
             "message": "Job description parsed and stored",
@@ -79,45 +87,22 @@ class JobApplication(BaseModel):
     job_id: str
 
 
-def assess_candidate_background(application_id: str, resume_id: str, job_id: str):
+async def assess_candidate_background(application_id: str, resume_id: str, job_id: str):
     """Background task to assess candidate"""
     try:
-        # Call the assessment endpoint
-        response = requests.post(
-            "http://localhost:8000/api/resume/assess-candidate",
-            json={
-                "resume_id": resume_id,
-                "job_id": job_id
-            }
-        )
-        
-        if response.status_code == 200:
-            assessment_data = response.json()
-            # Update application status with assessment_id
-            applications_collection.update_one(
-                {"_id": ObjectId(application_id)},
-                {
-                    "$set": {
-                        "assessment_id": assessment_data.get("assessment_id"),
-                        "status": "resume_assessed"
-                    }
-                }
-            )
-        else:
-            # Mark as failed assessment
-            applications_collection.update_one(
-                {"_id": ObjectId(application_id)},
-                {"$set": {"status": "assessment_failed"}}
-            )
+        # Same code path as POST /api/resume/assess-candidate, queued behind live interviews and uploads
+        assessment_data = await run_candidate_assessment(resume_id, job_id, priority=PRIORITY_BATCH)
+        # Update application status with assessment_id
+        queue_application_update(ObjectId(application_id), {
+            "assessment_id": assessment_data.get("assessment_id"),
+            "status": "resume_assessed"
+        })
     except Exception as e:
         print(f"Background assessment failed: {e}")
-        applications_collection.update_one(
-            {"_id": ObjectId(application_id)},
-            {"$set": {"status": "assessment_failed"}}
-        )
+        queue_application_update(ObjectId(application_id), {"status": "assessment_failed"})
 
 
-def apply_job(application: JobApplication, background_tasks: BackgroundTasks):
+async def apply_job(application: JobApplication, background_tasks: BackgroundTasks):
     # Validate Object IDs
     if not ObjectId.is_valid(application.user_id):
         raise HTTPException(status_code=400, detail="Invalid user_id")
@@ -140,10 +125,31 @@ def apply_job(application: JobApplication, background_tasks: BackgroundTasks):
     }
 
     try:
-        # Store application in the collection
-        result = applications_collection.insert_one(application_data)
+        # Instant local skill-overlap score; below the job's threshold the LLM assessment is deferred
+        resume_doc = await resumes_collection.find_one({"_id": resume_obj_id}, {"resume": 1})
+        job_doc = await get_cached_jd(job_obj_id)
+        defer_assessment = False
+        if resume_doc and job_doc:
+            prescore = prescore_resume(job_doc, resume_doc.get("resume", {}))
+            threshold = job_doc.get("prescore_threshold", DEFAULT_PRESCORE_THRESHOLD)
+            application_data["prescore"] = prescore
+            defer_assessment = prescore["score"] < threshold
+            if defer_assessment:
+                application_data["status"] = "assessment_deferred"
+
+        # Store application in the collection (unique on user_id + job_id, see utils/indexes.py)
+        try:
+            result = await applications_collection.insert_one(application_data)
+        except DuplicateKeyError:
+            raise HTTPException(status_code=409, detail="You have already applied to this job")
         application_id = str(result.inserted_id)
-        
+
+        if defer_assessment:
+            return {
+                "application_id": application_id,
+                "status": "Application submitted successfully."
+            }
+
         # Add background task to assess candidate
         background_tasks.add_task(
             assess_candidate_background,
@@ -156,12 +162,28 @@ def apply_job(application: JobApplication, background_tasks: BackgroundTasks):
             "application_id": application_id,
             "status": "Application submitted successfully. Assessment in progress."
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail="Failed to submit application")
 
 
 
-def get_applicants_for_job(job_id: str):
+def _applicant_summary(doc):
+    return {
+        "user_id": str(doc.get("user_id")),
+        "resume_id": str(doc.get("resume_id")),
+        "status": doc.get("status"),
+        "application_id": str(doc.get("_id")),
+        "prescore": (doc.get("prescore") or {}).get("score")
+    }
+
+
+def _id_string(doc):
+    return str(doc["_id"])
+
+
+async def get_applicants_for_job(job_id: str, response: Response, page: PageParams = Depends()):
     # Validate job_id
     if not ObjectId.is_valid(job_id):
         raise HTTPException(status_code=400, detail="Invalid job_id")
@@ -169,20 +191,15 @@ def get_applicants_for_job(job_id: str):
     job_obj_id = ObjectId(job_id)
 
     try:
-        # Query applications for this job
-        cursor = applications_collection.find({"job_id": job_obj_id})
-
-        applicants = []
-        for doc in cursor:
-            applicants.append({
-                "user_id": str(doc.get("user_id")),
-                "resume_id": str(doc.get("resume_id")),
-                "status": doc.get("status"),
-                "application_id": str(doc.get("_id"))
-            })
-        
-        return applicants
-        
+        # Query applications for this job, one keyset page at a time
+        return await paginate(
+            applications_collection,
+            {"job_id": job_obj_id},
+            {"user_id": 1, "resume_id": 1, "status": 1, "prescore.score": 1},
+            page,
+            response,
+            _applicant_summary,
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail="Failed to fetch applicants")
 
@@ -190,32 +207,52 @@ def get_applicants_for_job(job_id: str):
 
 
 
-def jobs_created_by_user(user_id: str):
+async def get_job_dashboard(
+    job_id: str,
+    sort_by: Literal[tuple(SORT_FIELDS)] = Query("overall_match_score"),
+    order: Literal["asc", "desc"] = Query("desc"),
+    status: Optional[str] = Query(None, description="Only applications with this status"),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0),
+):
+    """
+    Applicant table for a job in one aggregation: candidate name, prescore,
+    resume assessment scores, interview fitment rating and status per applicant.
+    GET /api/job/{job_id}/dashboard?sort_by=overall_match_score&order=desc
+    """
+    if not ObjectId.is_valid(job_id):
+        raise HTTPException(status_code=400, detail="Invalid job_id")
+
+    try:
+        dashboard = await job_dashboard(ObjectId(job_id), sort_by, order == "desc", status, offset, limit)
+    except PyMongoError as e:
+        raise HTTPException(status_code=500, detail=f"Failed to build applicant dashboard: {str(e)}")
+
+    return {"job_id": job_id, "sort_by": sort_by, "order": order, "offset": offset, **dashboard}
+
+
+async def jobs_created_by_user(user_id: str, response: Response, page: PageParams = Depends()):
     if not ObjectId.is_valid(user_id):
         raise HTTPException(status_code=400, detail="Invalid user_id")
 
     user_obj_id = ObjectId(user_id)
 
-    job_ids = []
     try:
-        cursor = jds_collection.find({"user_id": user_obj_id}, {"_id": 1})
-        for doc in cursor:
-            job_ids.append(str(doc["_id"]))
+        return await paginate(jds_collection, {"user_id": user_obj_id}, {"_id": 1}, page, response, _id_string)
     except PyMongoError:
         raise HTTPException(status_code=500, detail="Database query error")
     except Exception:
         raise HTTPException(status_code=500, detail="Internal server error")
 
-    return job_ids
-
 
-def delete_job(job_id: str):
+async def delete_job(job_id: str):
     if not ObjectId.is_valid(job_id):
         raise HTTPException(status_code=400, detail="Invalid job_id")
 
     job_obj_id = ObjectId(job_id)
 
-    delete_result = jds_collection.delete_one({"_id": job_obj_id})
+    delete_result = await jds_collection.delete_one({"_id": job_obj_id})
+    invalidate_jd(job_obj_id)
 
     if delete_result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Job not found")
@@ -223,15 +260,31 @@ def delete_job(job_id: str):
     return None
 
 
-def get_all_jobs():
-    job_ids = []
+async def set_prescore_threshold(job_id: str, threshold: float = Body(..., embed=True, ge=0, le=100)):
+    """
+    Set the provisional-score threshold below which new applications skip the LLM assessment
+    PUT /api/job/{job_id}/prescore-threshold
+    Body: {"threshold": 40}
+    """
+    if not ObjectId.is_valid(job_id):
+        raise HTTPException(status_code=400, detail="Invalid job_id")
+
+    result = await jds_collection.update_one(
+        {"_id": ObjectId(job_id)},
+        {"$set": {"prescore_threshold": threshold}}
+    )
+    invalidate_jd(job_id)
+    if result.matched_count == 0:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    return {"job_id": job_id, "prescore_threshold": threshold}
+
+
+async def get_all_jobs(response: Response, page: PageParams = Depends()):
     try:
-        cursor = jds_collection.find({}, {"_id": 1})
-        for doc in cursor:
-            job_ids.append(str(doc["_id"]))
+        return await paginate(jds_collection, {}, {"_id": 1}, page, response, _id_string)
     except Exception as e:
         raise HTTPException(status_code=500, detail="Failed to fetch jobs from database")
-    return job_ids
 
 
 async def get_application_details(application_id: str = Query(..., description="Application ID")):
@@ -241,7 +294,7 @@ async def get_application_details(application_id: str = Query(..., description="
     app_obj_id = ObjectId(application_id)
     print("app id: ", app_obj_id)
     try:
-        application = applications_collection.find_one({"_id": app_obj_id})
+        application = await applications_collection.find_one({"_id": app_obj_id})
         
         if not application:
             raise HTTPException(status_code=404, detail="Application not found")
@@ -267,7 +320,82 @@ async def get_application_details(application_id: str = Query(..., description="
         raise HTTPException(status_code=500, detail=f"Failed to fetch application details: {str(e)}")    
 
 
-def my_applications(user_id: str = Query(...)):
+EVENTS_HEARTBEAT_SECONDS = 15
+
+
+def _sse(data, event: str, event_id: str = None) -> str:
+    id_line = f"id: {event_id}\n" if event_id else ""
+    return f"{id_line}event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def stream_application_events(
+    application_id: Optional[str] = Query(None),
+    job_id: Optional[str] = Query(None),
+    user_id: Optional[str] = Query(None),
+    last_event_id: Optional[str] = Header(None),
+):
+    """
+    Server-sent events replacing polling of /status and /assessment-summary
+    GET /api/job/events?application_id=... (or job_id= / user_id=)
+    Emits a `snapshot` event ({"applications": [...], "truncated": bool}; at
+    most SNAPSHOT_LIMIT applications) on connect, then a `status` event per
+    change. EventSource reconnects send Last-Event-ID and are replayed what
+    they missed. 503 when MongoDB is not a replica set.
+    """
+    filters = {name: value for name, value in (("application_id", application_id), ("job_id", job_id), ("user_id", user_id)) if value}
+    if not filters:
+        raise HTTPException(status_code=400, detail="Provide application_id, job_id or user_id")
+    for name, value in filters.items():
+        if not ObjectId.is_valid(value):
+            raise HTTPException(status_code=400, detail=f"Invalid {name}")
+
+    try:
+        await application_event_hub.ensure_started()
+    except ChangeStreamsUnavailable:
+        raise HTTPException(status_code=503, detail="Application events require MongoDB change streams (replica set)")
+    except PyMongoError as e:
+        raise HTTPException(status_code=503, detail=f"Application events unavailable: {str(e)}")
+
+    subscriber = application_event_hub.subscribe(filters, last_event_id)
+    if not last_event_id:
+        subscriber.lagged = True
+
+    async def events():
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                if subscriber.lagged:
+                    snapshot = await application_event_hub.snapshot(subscriber)
+                    token = snapshot.pop("token")
+                    yield _sse(snapshot, "snapshot", token)
+                try:
+                    item = await asyncio.wait_for(subscriber.queue.get(), EVENTS_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if item is None:
+                    # Woken up to resync; the snapshot is sent at the top of the loop
+                    continue
+                token, event = item
+                yield _sse(event, "status", token)
+        finally:
+            application_event_hub.unsubscribe(subscriber)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+# Fields the candidate's application list shows; the full prescore breakdown stays server-side
+MY_APPLICATIONS_PROJECTION = {
+    "user_id": 1, "resume_id": 1, "job_id": 1, "status": 1, "application_date": 1,
+    "assessment_id": 1, "interview_id": 1, "final_assessment_id": 1, "candidate_accept": 1,
+}
+
+
+async def my_applications(response: Response, user_id: str = Query(...), page: PageParams = Depends()):
     # Validate user_id
     if not ObjectId.is_valid(user_id):
         raise HTTPException(status_code=400, detail="Invalid user_id")
@@ -275,18 +403,15 @@ def my_applications(user_id: str = Query(...)):
     user_obj_id = ObjectId(user_id)
     
     try:
-        # Query all applications for this user
-        cursor = applications_collection.find({"user_id": user_obj_id})
-        
-        applications = []
-        for app in cursor:
-            app["_id"] = str(app["_id"])
-            app["user_id"] = str(app["user_id"])
-            app["resume_id"] = str(app["resume_id"])
-            app["job_id"] = str(app["job_id"])
-            applications.append(app)
-        
-        return applications
+        # Query this user's applications, one keyset page at a time
+        return await paginate(
+            applications_collection,
+            {"user_id": user_obj_id},
+            MY_APPLICATIONS_PROJECTION,
+            page,
+            response,
+            convert_objectids,
+        )
         
     except Exception as e:
         raise HTTPException(status_code=500, detail="Failed to fetch applications")
@@ -307,12 +432,12 @@ async def set_candidate_decision(application_id: str, request: CandidateDecision
         raise HTTPException(status_code=400, detail="Invalid application_id")
     
     # Check if application exists
-    application_doc = applications_collection.find_one({"_id": ObjectId(application_id)})
+    application_doc = await applications_collection.find_one({"_id": ObjectId(application_id)})
     if not application_doc:
         raise HTTPException(status_code=404, detail="Application not found")
     
     # Update the candidate_accept field
-    result = applications_collection.update_one(
+    result = await applications_collection.update_one(
         {"_id": ObjectId(application_id)},
         {"$set": {"candidate_accept": request.candidate_accept}}
     )
@@ -339,7 +464,7 @@ async def get_candidate_decision(application_id: str):
         raise HTTPException(status_code=400, detail="Invalid application_id")
     
     # Find application
-    application_doc = applications_collection.find_one({"_id": ObjectId(application_id)})
+    application_doc = await applications_collection.find_one({"_id": ObjectId(application_id)})
     if not application_doc:
         raise HTTPException(status_code=404, detail="Application not found")
     
@@ -0,0 +1,35 @@
+from services.parse_cache import get_parse_cache_stats
+from services.fitment_cache import get_fitment_cache_stats
+from utils.singleflight import get_singleflight_stats
+from services.llm_gateway import get_structured_output_stats
+from services.llm_admission import get_admission_stats
+from services.prompt_context import get_prompt_context_stats
+from services.llm_hedging import get_hedge_stats
+from services.pdf_extraction import get_pdf_extraction_stats
+from services.bulk_ingest import get_bulk_ingest_stats
+from services.jd_cache import get_jd_cache_stats
+from utils.mongo_pool import get_mongo_pool_stats
+from services.application_writes import get_application_write_stats
+from services.application_events import get_application_events_stats
+
+
+async def get_metrics():
+    """
+    Per-worker counters for the caches and LLM plumbing.
+    GET /api/metrics
+    """
+    return {
+        "resume_parse_cache": get_parse_cache_stats(),
+        "fitment_cache": get_fitment_cache_stats(),
+        "coalesced_llm_calls": get_singleflight_stats(),
+        "structured_output": get_structured_output_stats(),
+        "llm_admission": get_admission_stats(),
+        "prompt_context": get_prompt_context_stats(),
+        "llm_hedging": get_hedge_stats(),
+        "pdf_extraction": get_pdf_extraction_stats(),
+        "bulk_ingest": get_bulk_ingest_stats(),
+        "jd_cache": get_jd_cache_stats(),
+        "mongo_pool": get_mongo_pool_stats(),
+        "application_writes": get_application_write_stats(),
+        "application_events": get_application_events_stats(),
+    }
@@ -1,14 +1,16 @@
-from fastapi import FastAPI, File, UploadFile, HTTPException, Body, Form
+from fastapi import FastAPI, File, UploadFile, HTTPException, Body, Form, Query
 from pydantic import BaseModel, Field, EmailStr
 from typing import List, Optional
 from bson import ObjectId
 from config import app
-from services.parsers import extract_text_from_pdf,parse_resume_with_gemini, extract_json_from_gemini_response
-from utils.pymango_wrappers import async_insert_one,async_find_one 
+from services.parsers import extract_text_from_pdf,parse_resume_with_gemini
 from config import resumes_collection
 from services.parsers import parse_jd_with_gemini
 from config import resumes_collection, jds_collection
 from utils.pymango_wrappers import convert_objectids
+from services.parse_cache import get_cached_resume, store_cached_resume, invalidate_resume_parse_cache
+from utils.uploads import spooled_pdf_upload
+from services.bulk_ingest import create_ingest_job, get_ingest_progress
 
 
 
@@ -24,18 +26,24 @@ async def upload_resume(
         raise HTTPException(status_code=400, detail="Only PDF files allowed")
 
     try:
-        pdf_bytes = await file.read()
-        text = extract_text_from_pdf(pdf_bytes)
+        # Streamed with a size cap and %PDF- check; large files are spooled to disk
+        async with spooled_pdf_upload(file) as pdf_source:
+            text = await extract_text_from_pdf(pdf_source)
         if not text.strip():
             raise HTTPException(status_code=400, detail="Empty PDF text")
 
-        parsed_resume = await parse_resume_with_gemini(text)
+        # Same PDF text + same prompt version -> reuse the earlier Gemini parse
+        parsed_resume = await get_cached_resume(text)
+        if parsed_resume is None:
+            parsed_resume = await parse_resume_with_gemini(text)
+            await store_cached_resume(text, parsed_resume)
+
         resume_data = parsed_resume.model_dump()
         resume_data["original_filename"] = file.filename
         resume_data["raw_text"] = text
         resume_data["user_id"] = user_id  # Add user_id to saved doc
 
-        result = await async_insert_one(resumes_collection, resume_data)
+        result = await resumes_collection.insert_one(resume_data)
         return {
             "message": "Resume parsed and stored",
             "resume_id": str(result.inserted_id),
@@ -50,10 +58,37 @@ async def get_resume(resume_id: str):
     resume_id = ObjectId(resume_id.strip())
     if not ObjectId.is_valid(resume_id):
         raise HTTPException(status_code=400, detail="Invalid resume ID")
-    resume = await async_find_one(resumes_collection, {"_id": ObjectId(resume_id)})
+    resume = await resumes_collection.find_one({"_id": ObjectId(resume_id)})
     if not resume:
         raise HTTPException(status_code=404, detail="Resume not found")
     resume["_id"] = str(resume["_id"])
     return resume
 
 
+async def invalidate_parse_cache(all_versions: bool = Query(False, description="Also drop entries for the current prompt version")):
+    deleted = await invalidate_resume_parse_cache(all_versions)
+    return {"message": "Resume parse cache invalidated", "deleted": deleted}
+
+
+async def bulk_upload_resumes(
+    files: List[UploadFile] = File(..., description="Resume PDFs and/or ZIP archives of PDFs"),
+    user_id: str = Form(...)
+):
+    """
+    Stages a batch of resumes and ingests them in the background.
+    Poll GET /api/resume/bulk-upload/{job_id} for per-item status.
+    """
+    if not ObjectId.is_valid(user_id):
+        raise HTTPException(status_code=400, detail="Invalid user_id")
+
+    job = await create_ingest_job(files, user_id)
+    return {
+        "message": "Bulk ingestion started",
+        "job_id": job.id,
+        "total": len(job.items),
+        "rejected": sum(1 for item in job.items if item["status"] == "failed"),
+    }
+
+
+async def get_bulk_upload_progress(job_id: str):
+    return await get_ingest_progress(job_id)
@@ -1,11 +1,11 @@
-from fastapi import APIRouter, Body, HTTPException, Path, Query
+from fastapi import APIRouter, Body, HTTPException, Path, Query, Depends, Response
 from pydantic import BaseModel, Field
 from typing import Optional
 from bson import ObjectId
-from fastapi.concurrency import run_in_threadpool
 from datetime import datetime
 from config import interviews_collection
 from dateutil.parser import parse
+from utils.pagination import PageParams, paginate
 
 
 
@@ -45,9 +45,7 @@ async def schedule_interview(request: InterviewScheduleRequest = Body(...)):
             "status": "scheduled"
         }
         # Store in MongoDB
-        result = await run_in_threadpool(
-            interviews_collection.insert_one, interview_event
-        )
+        result = await interviews_collection.insert_one(interview_event)
         session_id = str(result.inserted_id)
 
         return {
@@ -67,9 +65,7 @@ async def get_scheduled_interview(
 ):
     if not ObjectId.is_valid(interview_session_id):
         raise HTTPException(status_code=400, detail="Invalid interview_session_id")
-    interview = await run_in_threadpool(
-        interviews_collection.find_one, {"_id": ObjectId(interview_session_id)}
-    )
+    interview = await interviews_collection.find_one({"_id": ObjectId(interview_session_id)})
     if not interview:
         raise HTTPException(status_code=404, detail="Interview session not found")
     # Convert _id to string for JSON serialization
@@ -77,15 +73,28 @@ async def get_scheduled_interview(
     return interview
 
 
-async def get_all_scheduled_interviews(user_id: Optional[str] = Query(None, description="User ID to filter interviews")):
+def _interview_listing(interview):
+    # Convert ObjectIds to string for JSON serialization
+    interview["_id"] = str(interview["_id"])
+    return interview
+
+
+async def get_all_scheduled_interviews(
+    response: Response,
+    user_id: Optional[str] = Query(None, description="User ID to filter interviews"),
+    page: PageParams = Depends(),
+):
     filter_query = {}
     if user_id:
         filter_query["user_id"] = user_id  # Assuming interviews have a 'user_id' field
-    cursor = interviews_collection.find(filter_query)
-    interviews = await run_in_threadpool(list, cursor)
-    # Convert ObjectIds to string for all documents
-    for interview in interviews:
-        interview["_id"] = str(interview["_id"])
-    return interviews
+    # Live session state and video analysis are only served by the single-interview endpoint
+    return await paginate(
+        interviews_collection,
+        filter_query,
+        {"session": 0, "video_analysis": 0},
+        page,
+        response,
+        _interview_listing,
+    )
 
 
@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Body, HTTPException
 from pydantic import BaseModel
-from sarvamai import SarvamAI
+from services.providers import speech_provider
 from sarvamai.play import save
 import tempfile
 import os
@@ -14,11 +14,9 @@ class TTSRequest(BaseModel):
     model: str = "bulbul:v2"
     speaker: str = "anushka"
 
-client = SarvamAI(api_subscription_key=os.getenv("SARVAM_API_KEY"))
-
 async def text_to_speech(req: TTSRequest = Body(...)):
     try:
-        audio = client.text_to_speech.convert(
+        audio = await speech_provider.text_to_speech(
             target_language_code=req.target_language_code,
             text=req.text,
             model=req.model,
@@ -1,5 +1,5 @@
 
-from config import app
+from config import app, startup_hooks, shutdown_hooks
 from routes.resume_routes import resume_router
 from routes.job_routes import job_router
 from routes.interview_assess_routes import router as interview_router
@@ -7,6 +7,14 @@ from routes.speech_routes import router as speech_router
 from routes.schedule_routes import router as schedule_router
 from auth.routes import router as auth_router
 from routes.video_routes import router as video_router
+from routes.metrics_routes import router as metrics_router
+from services.pdf_extraction import shutdown_pdf_pool
+from utils.indexes import ensure_indexes
+from utils.uploads import UploadSizeLimitMiddleware, MAX_UPLOAD_BYTES
+from services.bulk_ingest import MAX_BULK_ZIP_BYTES, mark_stale_ingest_jobs, shutdown_bulk_ingest
+from services.jd_cache import start_jd_cache_watcher, stop_jd_cache_watcher
+from services.application_writes import shutdown_application_writes
+from services.application_events import stop_application_events
 
 
 app.include_router(auth_router)
@@ -16,6 +24,24 @@ app.include_router(interview_router)
 app.include_router(speech_router)
 app.include_router(schedule_router)
 app.include_router(video_router)
+app.include_router(metrics_router)
+
+# Reject oversized uploads before Starlette spools the multipart body
+app.add_middleware(UploadSizeLimitMiddleware, limits={
+    "/api/resume/upload-resume": MAX_UPLOAD_BYTES,
+    "/api/job/upload-jd": MAX_UPLOAD_BYTES,
+    "/api/resume/bulk-upload": MAX_BULK_ZIP_BYTES,
+})
+
+startup_hooks.append(ensure_indexes)
+startup_hooks.append(start_jd_cache_watcher)
+startup_hooks.append(mark_stale_ingest_jobs)
+# Before the PDF pool goes away, so cancelled jobs stop cleanly
+shutdown_hooks.append(shutdown_bulk_ingest)
+shutdown_hooks.append(shutdown_pdf_pool)
+shutdown_hooks.append(stop_jd_cache_watcher)
+shutdown_hooks.append(stop_application_events)
+shutdown_hooks.append(shutdown_application_writes)
 
 
 
@@ -1,10 +1,13 @@
 from fastapi import APIRouter, Body
-from controllers.interview_assess_controller import assess_candidate_interview,generate_next_question, get_interview_assessment, get_assessment_summary
+from controllers.interview_assess_controller import assess_candidate_interview,generate_next_question, stream_next_question, start_interview_session, next_session_question, get_interview_assessment, get_assessment_summary
 
 router = APIRouter(prefix="/api/interview", tags=["Assessment"])
 
 router.post("/assess-candidate")(assess_candidate_interview)
 router.post("/next-question")(generate_next_question)
+router.post("/next-question/stream")(stream_next_question)
+router.post("/session/{interview_session_id}/start")(start_interview_session)
+router.post("/session/{interview_session_id}/next-question")(next_session_question)
 router.get("/assessment-summary/{application_id}")(get_assessment_summary)
 router.get("/assessment/{application_id}")(get_interview_assessment)
 
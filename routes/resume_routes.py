@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from controllers.resume_controller import upload_resume,get_resume
+from controllers.resume_controller import upload_resume,get_resume, invalidate_parse_cache, bulk_upload_resumes, get_bulk_upload_progress
 from controllers.resume_assessment_controller import assess_candidate, get_assessment
 
 
@@ -9,6 +9,6 @@ resume_router.get("/{resume_id}")(get_resume)
 resume_router.post("/upload-resume")(upload_resume)
 resume_router.get("/assessment/{assessment_id}")(get_assessment)
 resume_router.post("/assess-candidate")(assess_candidate)
-
-
-
+resume_router.delete("/parse-cache")(invalidate_parse_cache)
+resume_router.post("/bulk-upload")(bulk_upload_resumes)
+resume_router.get("/bulk-upload/{job_id}")(get_bulk_upload_progress)
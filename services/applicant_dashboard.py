@@ -0,0 +1,130 @@
+from bson import ObjectId
+from config import list_reads, applications_collection, resumes_collection, assessments_collection, interview_assessments_collection
+
+
+# One aggregation behind a job's applicant table: applications joined with the
+# candidate's resume (name/email), the resume fitment assessment (scores) and
+# the newest interview assessment (fitment rating), flattened into table rows.
+# Replaces the frontend's per-row /resume, /resume/assessment and
+# /interview/assessment-summary calls.
+
+# Sortable columns -> field in the flattened row
+SORT_FIELDS = {
+    "candidate_name": "candidate_name",
+    "status": "status",
+    "application_date": "application_date",
+    "prescore": "prescore",
+    "overall_match_score": "overall_match_score",
+    "skills_match_score": "skills_match_score",
+    "experience_match_score": "experience_match_score",
+    "education_match_score": "education_match_score",
+    "fitment_rating": "fitment_rating",
+}
+
+# Columns that live on the application itself can be sorted and paged before
+# the joins, so only the requested page is looked up
+APPLICATION_SORT_FIELDS = {
+    "status": "status",
+    "application_date": "application_date",
+    "prescore": "prescore.score",
+}
+
+_APPLICATION_FIELDS = {
+    "user_id": 1, "resume_id": 1, "status": 1, "application_date": 1,
+    "prescore.score": 1, "assessment_id": 1, "candidate_accept": 1,
+}
+
+
+def _lookups():
+    return [
+        {"$lookup": {
+            "from": resumes_collection.name,
+            "localField": "resume_id",
+            "foreignField": "_id",
+            "pipeline": [{"$project": {"resume.header": 1}}],
+            "as": "resume_doc",
+        }},
+        # assessment_id is stored as a string on applications
+        {"$lookup": {
+            "from": assessments_collection.name,
+            "let": {"assessment_oid": {"$convert": {
+                "input": "$assessment_id", "to": "objectId", "onError": None, "onNull": None,
+            }}},
+            "pipeline": [
+                {"$match": {"$expr": {"$eq": ["$_id", "$$assessment_oid"]}}},
+                {"$project": {
+                    "candidate_name": 1, "overall_match_score": 1, "skills_match_score": 1,
+                    "experience_match_score": 1, "education_match_score": 1, "recommendation": 1,
+                }},
+            ],
+            "as": "assessment_doc",
+        }},
+        {"$lookup": {
+            "from": interview_assessments_collection.name,
+            "localField": "_id",
+            "foreignField": "application_id",
+            "pipeline": [
+                {"$sort": {"created_at": -1}},
+                {"$limit": 1},
+                {"$project": {"assessment.fitment_rating": 1}},
+            ],
+            "as": "interview_doc",
+        }},
+        {"$unwind": {"path": "$resume_doc", "preserveNullAndEmptyArrays": True}},
+        {"$unwind": {"path": "$assessment_doc", "preserveNullAndEmptyArrays": True}},
+        {"$unwind": {"path": "$interview_doc", "preserveNullAndEmptyArrays": True}},
+        {"$project": {
+            "_id": 0,
+            "application_id": {"$toString": "$_id"},
+            "user_id": {"$toString": "$user_id"},
+            "resume_id": {"$toString": "$resume_id"},
+            "candidate_name": {"$ifNull": [
+                "$resume_doc.resume.header.full_name", "$assessment_doc.candidate_name",
+            ]},
+            "email": "$resume_doc.resume.header.contact_information.email",
+            "status": 1,
+            "application_date": 1,
+            "candidate_accept": 1,
+            "prescore": "$prescore.score",
+            "assessment_id": 1,
+            "overall_match_score": "$assessment_doc.overall_match_score",
+            "skills_match_score": "$assessment_doc.skills_match_score",
+            "experience_match_score": "$assessment_doc.experience_match_score",
+            "education_match_score": "$assessment_doc.education_match_score",
+            "recommendation": "$assessment_doc.recommendation",
+            "interview_assessment_id": {"$toString": "$interview_doc._id"},
+            "fitment_rating": "$interview_doc.assessment.fitment_rating",
+        }},
+    ]
+
+
+def build_dashboard_pipeline(job_id: ObjectId, sort_by: str, descending: bool, status: str = None,
+                             offset: int = 0, limit: int = 100) -> list:
+    match = {"job_id": job_id}
+    if status:
+        match["status"] = status
+    direction = -1 if descending else 1
+
+    if sort_by in APPLICATION_SORT_FIELDS:
+        sort = {APPLICATION_SORT_FIELDS[sort_by]: direction, "_id": 1}
+        rows = [{"$sort": sort}, {"$skip": offset}, {"$limit": limit}, *_lookups()]
+    else:
+        sort = {SORT_FIELDS[sort_by]: direction, "application_id": 1}
+        rows = [*_lookups(), {"$sort": sort}, {"$skip": offset}, {"$limit": limit}]
+
+    return [
+        {"$match": match},
+        {"$project": _APPLICATION_FIELDS},
+        {"$facet": {"total": [{"$count": "count"}], "applicants": rows}},
+    ]
+
+
+async def job_dashboard(job_id: ObjectId, sort_by: str = "overall_match_score", descending: bool = True,
+                        status: str = None, offset: int = 0, limit: int = 100) -> dict:
+    pipeline = build_dashboard_pipeline(job_id, sort_by, descending, status, offset, limit)
+    cursor = await list_reads(applications_collection).aggregate(pipeline)
+    result = (await cursor.to_list())[0]
+    return {
+        "total": result["total"][0]["count"] if result["total"] else 0,
+        "applicants": result["applicants"],
+    }
@@ -0,0 +1,233 @@
+import asyncio
+import os
+from collections import deque
+from bson import ObjectId
+from pymongo.errors import OperationFailure, PyMongoError
+from config import applications_collection
+
+
+# Push-based application status. One change stream on the applications
+# collection per worker, opened when the first client subscribes, is fanned
+# out to every subscriber whose filter (application_id / job_id / user_id)
+# matches. Each event carries its resume token as the SSE id; the last
+# APPLICATION_EVENTS_BUFFER events are kept so a client reconnecting with
+# Last-Event-ID is replayed what it missed. If the id is no longer buffered
+# (or the client fell behind), the client gets a snapshot of the current
+# state instead. The snapshot carries the newest buffered token and replaces
+# anything still queued for the subscriber, so event ids never go backwards.
+# Snapshots hold at most SNAPSHOT_LIMIT applications and say when they were cut.
+#
+# Change streams need a replica set. For local development and tests a
+# single-node one is enough:
+#   mongod --replSet rs0  &&  mongosh --eval 'rs.initiate()'
+#   MONGO_URI=mongodb://localhost:27017/?replicaSet=rs0&directConnection=true
+
+APPLICATION_EVENTS_BUFFER = int(os.getenv("APPLICATION_EVENTS_BUFFER", "1000"))
+SUBSCRIBER_QUEUE_SIZE = int(os.getenv("APPLICATION_EVENTS_QUEUE_SIZE", "100"))
+SNAPSHOT_LIMIT = 500
+
+# Fields subscribers see; everything else on the application stays server-side
+EVENT_FIELDS = [
+    "user_id", "resume_id", "job_id", "status", "assessment_id",
+    "interview_id", "final_assessment_id", "candidate_accept",
+]
+
+# Change stream error codes meaning "not a replica set / sharded cluster"
+_NOT_SUPPORTED_CODES = {40573, 40324}
+# Resume token fell off the oplog / stream cannot be resumed
+_HISTORY_LOST_CODES = {280, 286}
+
+
+class ChangeStreamsUnavailable(Exception):
+    pass
+
+
+def serialize_application(application: dict) -> dict:
+    event = {"application_id": str(application["_id"])}
+    for field in EVENT_FIELDS:
+        value = application.get(field)
+        event[field] = str(value) if isinstance(value, ObjectId) else value
+    return event
+
+
+class Subscriber:
+    def __init__(self, filters: dict):
+        self.filters = filters
+        self.queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        # Set when events were dropped because the client could not keep up
+        self.lagged = False
+
+    def matches(self, event: dict) -> bool:
+        return all(event.get(field) == value for field, value in self.filters.items())
+
+    def offer(self, token: str, event: dict):
+        if self.lagged:
+            return
+        try:
+            self.queue.put_nowait((token, event))
+        except asyncio.QueueFull:
+            self.mark_lagged()
+
+    def drain(self):
+        while not self.queue.empty():
+            self.queue.get_nowait()
+
+    def mark_lagged(self):
+        """Drops queued events and wakes the consumer, which then sends a snapshot."""
+        self.lagged = True
+        self.drain()
+        self.queue.put_nowait(None)
+
+
+class ApplicationEventHub:
+    def __init__(self):
+        self.subscribers = set()
+        self.recent = deque(maxlen=APPLICATION_EVENTS_BUFFER)
+        self.resume_token = None
+        self._stream = None
+        self._task = None
+        self._start_lock = asyncio.Lock()
+        self.stats = {"events": 0, "delivered": 0, "replayed": 0, "snapshots": 0, "snapshots_truncated": 0, "stream_restarts": 0}
+
+    async def _open(self):
+        pipeline = [
+            {"$match": {"operationType": {"$in": ["insert", "update", "replace"]}}},
+            {"$project": {"operationType": 1, "documentKey": 1, **{f"fullDocument.{field}": 1 for field in EVENT_FIELDS}}},
+        ]
+        try:
+            return await applications_collection.watch(
+                pipeline, full_document="updateLookup", resume_after=self.resume_token
+            )
+        except OperationFailure as e:
+            if e.code in _NOT_SUPPORTED_CODES:
+                raise ChangeStreamsUnavailable(str(e)) from e
+            raise
+
+    async def ensure_started(self):
+        """Opens the shared change stream; raises ChangeStreamsUnavailable without a replica set."""
+        async with self._start_lock:
+            if self._task is not None and not self._task.done():
+                return
+            self._stream = await self._open()
+            self._task = asyncio.create_task(self._run())
+
+    def _resync_all(self):
+        # Events were missed: buffered tokens are useless and everyone needs a snapshot
+        self.resume_token = None
+        self.recent.clear()
+        for subscriber in self.subscribers:
+            subscriber.mark_lagged()
+
+    async def _run(self):
+        try:
+            while True:
+                try:
+                    if self._stream is None:
+                        self._stream = await self._open()
+                    async for change in self._stream:
+                        self._publish(change)
+                    # Stream invalidated (collection dropped/renamed)
+                    self._resync_all()
+                except (PyMongoError, ChangeStreamsUnavailable) as e:
+                    print(f"[application_events] change stream error, reopening: {e}")
+                    if isinstance(e, OperationFailure) and e.code in _HISTORY_LOST_CODES:
+                        self._resync_all()
+                except Exception as e:
+                    # e.g. an unexpected change shape; never leave subscribers on keepalives only
+                    print(f"[application_events] change stream handler failed, resyncing: {e!r}")
+                    self._resync_all()
+                await self._close_stream()
+                self.stats["stream_restarts"] += 1
+                await asyncio.sleep(1)
+        finally:
+            # Also on cancellation, so stop() returns with the cursor closed
+            await self._close_stream()
+
+    async def _close_stream(self):
+        stream, self._stream = self._stream, None
+        if stream is not None:
+            await stream.close()
+
+    def _publish(self, change: dict):
+        self.resume_token = change["_id"]
+        document = change.get("fullDocument")
+        if document is None:
+            # Application deleted before the update was looked up
+            return
+        token = change["_id"]["_data"]
+        event = serialize_application({"_id": change["documentKey"]["_id"], **document})
+        self.recent.append((token, event))
+        self.stats["events"] += 1
+        for subscriber in self.subscribers:
+            if subscriber.matches(event):
+                subscriber.offer(token, event)
+                self.stats["delivered"] += 1
+
+    def subscribe(self, filters: dict, last_event_id: str = None) -> Subscriber:
+        """
+        Registers a subscriber. With `last_event_id`, buffered events after it are
+        queued first; if it is unknown the subscriber is marked to get a snapshot.
+        """
+        subscriber = Subscriber(filters)
+        if last_event_id:
+            tokens = [token for token, _ in self.recent]
+            if last_event_id in tokens:
+                for token, event in list(self.recent)[tokens.index(last_event_id) + 1:]:
+                    if subscriber.matches(event):
+                        subscriber.offer(token, event)
+                        self.stats["replayed"] += 1
+            else:
+                subscriber.lagged = True
+        self.subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        self.subscribers.discard(subscriber)
+
+    async def snapshot(self, subscriber: Subscriber) -> dict:
+        """
+        Current state of every application the subscriber is watching, as
+        {"token", "applications", "truncated"}. Events already queued for the
+        subscriber are dropped: they are no newer than `token` and the query
+        below sees their effect. Later events follow with newer tokens.
+        """
+        self.stats["snapshots"] += 1
+        subscriber.lagged = False
+        token = self.recent[-1][0] if self.recent else None
+        subscriber.drain()
+        query = {("_id" if field == "application_id" else field): ObjectId(value) for field, value in subscriber.filters.items()}
+        projection = {field: 1 for field in EVENT_FIELDS}
+        applications = await applications_collection.find(query, projection).sort("_id", 1).limit(SNAPSHOT_LIMIT + 1).to_list()
+        truncated = len(applications) > SNAPSHOT_LIMIT
+        if truncated:
+            self.stats["snapshots_truncated"] += 1
+        return {
+            "token": token,
+            "applications": [serialize_application(application) for application in applications[:SNAPSHOT_LIMIT]],
+            "truncated": truncated,
+        }
+
+    async def stop(self):
+        """Cancels the stream task and waits for it to close the change stream."""
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+
+application_event_hub = ApplicationEventHub()
+
+
+async def stop_application_events():
+    """Shutdown hook; runs before config.close_mongo()."""
+    await application_event_hub.stop()
+
+
+def get_application_events_stats():
+    hub = application_event_hub
+    return {
+        **hub.stats,
+        "subscribers": len(hub.subscribers),
+        "buffered": len(hub.recent),
+        "stream_open": hub._task is not None and not hub._task.done(),
+    }
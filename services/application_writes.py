@@ -0,0 +1,133 @@
+import asyncio
+import os
+import time
+from collections import deque
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, PyMongoError
+from config import applications_collection
+
+
+# Write-behind buffer for background application updates (status,
+# assessment_id). Updates are merged per application in arrival order, so the
+# last value of each field wins, and written with one unordered bulk_write
+# when APPLICATION_WRITE_BATCH_SIZE applications are pending or
+# APPLICATION_WRITE_FLUSH_SECONDS after the first queued update. Flushes are
+# serialized, so a later update to an application is never written before an
+# earlier one. Readers may see the previous status for up to the flush
+# interval. Pending updates are flushed at shutdown.
+
+APPLICATION_WRITE_BATCH_SIZE = int(os.getenv("APPLICATION_WRITE_BATCH_SIZE", "100"))
+APPLICATION_WRITE_FLUSH_SECONDS = float(os.getenv("APPLICATION_WRITE_FLUSH_SECONDS", "0.5"))
+_RATE_WINDOW_SECONDS = 60
+
+_pending = {}
+_flush_lock = asyncio.Lock()
+_timer = None
+_size_flush = None
+# (finished_at, updates coalesced into the flush, documents written)
+_recent_flushes = deque()
+
+application_write_stats = {
+    "updates_queued": 0,
+    "coalesced": 0,
+    "flushes": 0,
+    "documents_written": 0,
+    "write_errors": 0,
+    "flush_errors": 0,
+    "flush_latency_total_ms": 0.0,
+    "flush_latency_max_ms": 0.0,
+}
+
+
+def queue_application_update(application_id, fields: dict):
+    """Buffers a $set of `fields` on the application; returns immediately."""
+    global _timer, _size_flush
+    application_write_stats["updates_queued"] += 1
+    entry = _pending.get(application_id)
+    if entry is None:
+        _pending[application_id] = {"fields": dict(fields), "updates": 1}
+    else:
+        application_write_stats["coalesced"] += 1
+        entry["fields"].update(fields)
+        entry["updates"] += 1
+
+    if len(_pending) >= APPLICATION_WRITE_BATCH_SIZE:
+        if _size_flush is None or _size_flush.done():
+            _size_flush = asyncio.ensure_future(flush_application_updates())
+    elif _timer is None or _timer.done():
+        _timer = asyncio.ensure_future(_flush_later())
+
+
+async def _flush_later():
+    await asyncio.sleep(APPLICATION_WRITE_FLUSH_SECONDS)
+    await flush_application_updates()
+
+
+def _requeue(batch: dict):
+    # Anything queued since the batch was taken is newer and wins
+    for application_id, entry in batch.items():
+        newer = _pending.get(application_id)
+        if newer is None:
+            _pending[application_id] = entry
+        else:
+            newer["fields"] = {**entry["fields"], **newer["fields"]}
+            newer["updates"] += entry["updates"]
+
+
+async def flush_application_updates():
+    global _pending, _timer
+    async with _flush_lock:
+        if not _pending:
+            return
+        batch, _pending = _pending, {}
+        operations = [UpdateOne({"_id": application_id}, {"$set": entry["fields"]}) for application_id, entry in batch.items()]
+
+        start = time.perf_counter()
+        try:
+            await applications_collection.bulk_write(operations, ordered=False)
+            written = len(operations)
+        except BulkWriteError as e:
+            # Per-document failures (e.g. validation) will not succeed on retry
+            errors = e.details.get("writeErrors", [])
+            application_write_stats["write_errors"] += len(errors)
+            written = len(operations) - len(errors)
+            print(f"[application_writes] {len(errors)} update(s) failed: {errors[:3]}")
+        except PyMongoError as e:
+            application_write_stats["flush_errors"] += 1
+            print(f"[application_writes] flush of {len(operations)} update(s) failed, will retry: {e}")
+            _requeue(batch)
+            if _timer is None or _timer.done() or _timer is asyncio.current_task():
+                _timer = asyncio.ensure_future(_flush_later())
+            return
+
+        latency_ms = (time.perf_counter() - start) * 1000
+        application_write_stats["flushes"] += 1
+        application_write_stats["documents_written"] += written
+        application_write_stats["flush_latency_total_ms"] += latency_ms
+        application_write_stats["flush_latency_max_ms"] = max(application_write_stats["flush_latency_max_ms"], latency_ms)
+        _recent_flushes.append((time.monotonic(), sum(entry["updates"] for entry in batch.values()), written))
+
+
+async def shutdown_application_writes():
+    """Shutdown hook: writes whatever is still buffered (after any flush in progress)."""
+    await flush_application_updates()
+    if _pending:
+        print(f"[application_writes] {len(_pending)} application update(s) could not be written at shutdown")
+
+
+def get_application_write_stats():
+    cutoff = time.monotonic() - _RATE_WINDOW_SECONDS
+    while _recent_flushes and _recent_flushes[0][0] < cutoff:
+        _recent_flushes.popleft()
+    window_updates = sum(updates for _, updates, _ in _recent_flushes)
+    flushes = application_write_stats["flushes"]
+    return {
+        **application_write_stats,
+        "flush_latency_total_ms": round(application_write_stats["flush_latency_total_ms"], 2),
+        "flush_latency_max_ms": round(application_write_stats["flush_latency_max_ms"], 2),
+        "flush_latency_avg_ms": round(application_write_stats["flush_latency_total_ms"] / flushes, 3) if flushes else 0.0,
+        "pending": len(_pending),
+        # Over the last minute: updates requested vs bulk_write round trips actually sent
+        "updates_per_sec": round(window_updates / _RATE_WINDOW_SECONDS, 3),
+        "write_ops_per_sec": round(len(_recent_flushes) / _RATE_WINDOW_SECONDS, 3),
+    }
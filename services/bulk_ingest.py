@@ -0,0 +1,381 @@
+import asyncio
+import os
+import shutil
+import tempfile
+import time
+import zipfile
+from collections import OrderedDict
+from datetime import datetime
+from bson import ObjectId
+from fastapi import HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from pymongo.errors import BulkWriteError, PyMongoError
+from config import resumes_collection, resume_ingest_jobs_collection
+from services.llm_admission import PRIORITY_BATCH
+from services.parse_cache import get_cached_resume, store_cached_resume
+from services.parsers import extract_text_from_pdf, parse_resume_with_gemini
+from services.pdf_extraction import PDF_WORKERS
+from utils.uploads import MAX_UPLOAD_BYTES, ZIP_MAGIC, is_pdf, save_upload
+
+
+# Bulk resume ingestion (job fairs etc.). The request only stages the uploaded
+# PDFs / ZIP on disk and returns a job id; the job then runs as three
+# overlapping stages connected by bounded queues:
+#   extract - PDF text via the process pool (services/pdf_extraction.py)
+#   parse   - parse cache, then Gemini at batch priority, BULK_PARSE_CONCURRENCY at a time
+#   store   - insert_many in batches of BULK_INSERT_BATCH_SIZE (or every few seconds)
+# Every item carries its own status; progress is kept in memory and
+# checkpointed to resume_ingest_jobs after each insert so any worker can report it.
+# Jobs still running at shutdown are cancelled and checkpointed as
+# "interrupted"; a "running" checkpoint not updated for BULK_INGEST_STALE_SECONDS
+# (its worker died) is reported, and marked at startup, as interrupted too.
+
+MAX_BULK_ITEMS = int(os.getenv("BULK_INGEST_MAX_ITEMS", "500"))
+MAX_BULK_ZIP_BYTES = int(os.getenv("BULK_INGEST_MAX_ZIP_BYTES", str(200 * 1024 * 1024)))
+EXTRACT_CONCURRENCY = int(os.getenv("BULK_EXTRACT_CONCURRENCY", str(PDF_WORKERS)))
+PARSE_CONCURRENCY = int(os.getenv("BULK_PARSE_CONCURRENCY", "4"))
+INSERT_BATCH_SIZE = int(os.getenv("BULK_INSERT_BATCH_SIZE", "25"))
+INSERT_FLUSH_SECONDS = 2.0
+STAGE_QUEUE_SIZE = 16
+EXTRACT_BUSY_RETRIES = 10
+MAX_TRACKED_JOBS = 100
+STALE_CHECKPOINT_SECONDS = int(os.getenv("BULK_INGEST_STALE_SECONDS", "900"))
+
+_jobs = OrderedDict()
+_running_tasks = set()
+
+bulk_ingest_stats = {"jobs": 0, "items": 0, "stored": 0, "failed": 0}
+
+
+def _error_message(error) -> str:
+    if isinstance(error, HTTPException):
+        return str(error.detail)
+    return str(error) or error.__class__.__name__
+
+
+class IngestJob:
+    def __init__(self, user_id: str, workdir: str):
+        self.id = str(ObjectId())
+        self.user_id = user_id
+        self.workdir = workdir
+        self.items = []
+        self.sources = {}
+        self.status = "running"
+        self.created_at = datetime.utcnow().isoformat()
+        self.started = time.monotonic()
+        self.elapsed = None
+
+    def add(self, filename: str, source=None, error=None):
+        item = {"index": len(self.items), "filename": filename, "status": "queued", "resume_id": None, "error": None}
+        self.items.append(item)
+        if error is not None:
+            self.fail(item, error)
+        else:
+            self.sources[item["index"]] = source
+
+    def update(self, item: dict, status: str, **fields):
+        item["status"] = status
+        item.update(fields)
+        if status == "stored":
+            bulk_ingest_stats["stored"] += 1
+            self.sources.pop(item["index"], None)
+
+    def fail(self, item: dict, error):
+        item["status"] = "failed"
+        item["error"] = _error_message(error)
+        bulk_ingest_stats["failed"] += 1
+        self.sources.pop(item["index"], None)
+
+    def finish(self, status: str = "completed"):
+        self.status = status
+        self.elapsed = time.monotonic() - self.started
+
+    def progress(self) -> dict:
+        counts = {}
+        for item in self.items:
+            counts[item["status"]] = counts.get(item["status"], 0) + 1
+        elapsed = self.elapsed if self.elapsed is not None else time.monotonic() - self.started
+        stored = counts.get("stored", 0)
+        return {
+            "job_id": self.id,
+            "user_id": self.user_id,
+            "status": self.status,
+            "created_at": self.created_at,
+            "total": len(self.items),
+            "completed": stored + counts.get("failed", 0),
+            "counts": counts,
+            "elapsed_seconds": round(elapsed, 1),
+            "resumes_per_minute": round(stored / (elapsed / 60), 1) if elapsed > 0 else 0.0,
+            "items": self.items,
+        }
+
+
+async def _persist(job: IngestJob):
+    # Best effort: progress stays available in memory even if the checkpoint fails
+    try:
+        await resume_ingest_jobs_collection.replace_one(
+            {"_id": ObjectId(job.id)},
+            {"_id": ObjectId(job.id), **job.progress(), "updated_at": time.time()},
+            upsert=True,
+        )
+    except Exception as e:
+        print(f"[bulk_ingest] checkpoint failed for job {job.id}: {e}")
+
+
+def _zip_members(zip_path: str):
+    with zipfile.ZipFile(zip_path) as archive:
+        return [
+            member for member in archive.infolist()
+            if not member.is_dir()
+            and member.filename.lower().endswith(".pdf")
+            and not member.filename.startswith("__MACOSX/")
+        ]
+
+
+async def _stage_upload(job: IngestJob, file: UploadFile):
+    name = file.filename or "upload"
+    if name.lower().endswith(".zip"):
+        fd, zip_path = tempfile.mkstemp(suffix=".zip", dir=job.workdir)
+        os.close(fd)
+        try:
+            await save_upload(file, zip_path, MAX_BULK_ZIP_BYTES, ZIP_MAGIC, "ZIP")
+            members = await run_in_threadpool(_zip_members, zip_path)
+        except (HTTPException, zipfile.BadZipFile) as e:
+            job.add(name, error=e)
+            return
+        for member in members:
+            if member.file_size > MAX_UPLOAD_BYTES:
+                job.add(member.filename, error=f"File too large; the limit is {MAX_UPLOAD_BYTES} bytes")
+            else:
+                job.add(member.filename, ("zip", zip_path, member.filename))
+    elif name.lower().endswith(".pdf"):
+        path = os.path.join(job.workdir, f"{len(job.items)}.pdf")
+        try:
+            await save_upload(file, path)
+        except HTTPException as e:
+            job.add(name, error=e)
+            return
+        job.add(name, ("file", path))
+    else:
+        job.add(name, error="Only PDF or ZIP files allowed")
+
+
+async def create_ingest_job(files, user_id: str) -> IngestJob:
+    """Stages the uploads on disk and starts the ingestion pipeline in the background."""
+    job = IngestJob(user_id, tempfile.mkdtemp(prefix="ingest-"))
+    try:
+        for file in files:
+            await _stage_upload(job, file)
+            if len(job.items) > MAX_BULK_ITEMS:
+                raise HTTPException(status_code=400, detail=f"Too many resumes; the limit is {MAX_BULK_ITEMS} per batch")
+        if not job.items:
+            raise HTTPException(status_code=400, detail="No PDF files found in the upload")
+    except Exception:
+        shutil.rmtree(job.workdir, ignore_errors=True)
+        raise
+
+    _jobs[job.id] = job
+    while len(_jobs) > MAX_TRACKED_JOBS:
+        oldest = next(iter(_jobs.values()))
+        if oldest.status == "running":
+            break
+        _jobs.popitem(last=False)
+    bulk_ingest_stats["jobs"] += 1
+    bulk_ingest_stats["items"] += len(job.items)
+
+    await _persist(job)
+    task = asyncio.create_task(_run_pipeline(job))
+    _running_tasks.add(task)
+    task.add_done_callback(_running_tasks.discard)
+    return job
+
+
+# ------------------ pipeline stages ------------------
+
+
+def _read_zip_member(zip_path: str, member: str) -> bytes:
+    with zipfile.ZipFile(zip_path) as archive, archive.open(member) as f:
+        # Read at most one byte past the limit; guards against lying zip headers
+        data = f.read(MAX_UPLOAD_BYTES + 1)
+    if len(data) > MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail=f"File too large; the limit is {MAX_UPLOAD_BYTES} bytes")
+    if not is_pdf(data):
+        raise HTTPException(status_code=400, detail="File is not a PDF file")
+    return data
+
+
+async def _extract(source) -> str:
+    if source[0] == "zip":
+        source = await run_in_threadpool(_read_zip_member, source[1], source[2])
+    else:
+        source = source[1]
+
+    # Interactive uploads share the pool; wait for room instead of failing the item
+    for attempt in range(EXTRACT_BUSY_RETRIES):
+        try:
+            return await extract_text_from_pdf(source)
+        except HTTPException as e:
+            if e.status_code != 503 or attempt == EXTRACT_BUSY_RETRIES - 1:
+                raise
+            await asyncio.sleep(1)
+
+
+async def _extract_stage(job: IngestJob, extract_queue: asyncio.Queue, parse_queue: asyncio.Queue):
+    while True:
+        try:
+            item = extract_queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return
+        job.update(item, "extracting")
+        try:
+            text = await _extract(job.sources[item["index"]])
+            if not text.strip():
+                raise HTTPException(status_code=400, detail="Empty PDF text")
+        except Exception as e:
+            job.fail(item, e)
+            continue
+        await parse_queue.put((item, text))
+
+
+async def _parse_stage(job: IngestJob, parse_queue: asyncio.Queue, store_queue: asyncio.Queue):
+    while (entry := await parse_queue.get()) is not None:
+        item, text = entry
+        job.update(item, "parsing")
+        try:
+            parsed_resume = await get_cached_resume(text)
+            if parsed_resume is None:
+                parsed_resume = await parse_resume_with_gemini(text, priority=PRIORITY_BATCH)
+                await store_cached_resume(text, parsed_resume)
+        except Exception as e:
+            job.fail(item, e)
+            continue
+
+        resume_data = parsed_resume.model_dump()
+        resume_data["original_filename"] = item["filename"]
+        resume_data["raw_text"] = text
+        resume_data["user_id"] = job.user_id
+        item["candidate_name"] = parsed_resume.resume.header.full_name
+        await store_queue.put((item, resume_data))
+
+
+async def _insert_batch(job: IngestJob, batch: list):
+    try:
+        await resumes_collection.insert_many([doc for _, doc in batch], ordered=False)
+        failed = {}
+    except BulkWriteError as e:
+        failed = {error["index"]: error["errmsg"] for error in e.details.get("writeErrors", [])}
+    except Exception as e:
+        failed = {index: _error_message(e) for index in range(len(batch))}
+
+    for index, (item, doc) in enumerate(batch):
+        if index in failed:
+            job.fail(item, failed[index])
+        else:
+            # insert_many sets _id on each document in place
+            job.update(item, "stored", resume_id=str(doc["_id"]))
+    await _persist(job)
+
+
+async def _store_stage(job: IngestJob, store_queue: asyncio.Queue):
+    batch = []
+    while True:
+        try:
+            entry = await asyncio.wait_for(store_queue.get(), INSERT_FLUSH_SECONDS if batch else None)
+        except asyncio.TimeoutError:
+            entry = False
+        if entry:
+            job.update(entry[0], "storing")
+            batch.append(entry)
+        if batch and (not entry or len(batch) >= INSERT_BATCH_SIZE):
+            await _insert_batch(job, batch)
+            batch = []
+        if entry is None:
+            return
+
+
+async def _run_pipeline(job: IngestJob):
+    extract_queue = asyncio.Queue()
+    parse_queue = asyncio.Queue(STAGE_QUEUE_SIZE)
+    store_queue = asyncio.Queue(STAGE_QUEUE_SIZE)
+    for item in job.items:
+        if item["status"] == "queued":
+            extract_queue.put_nowait(item)
+
+    parsers = [asyncio.create_task(_parse_stage(job, parse_queue, store_queue)) for _ in range(PARSE_CONCURRENCY)]
+    store = asyncio.create_task(_store_stage(job, store_queue))
+    status = "completed"
+    try:
+        await asyncio.gather(*(_extract_stage(job, extract_queue, parse_queue) for _ in range(EXTRACT_CONCURRENCY)))
+        for _ in parsers:
+            await parse_queue.put(None)
+        await asyncio.gather(*parsers)
+        await store_queue.put(None)
+        await store
+    except asyncio.CancelledError:
+        # Shutdown: leave unfinished items for the user to resubmit
+        status = "interrupted"
+        for task in (*parsers, store):
+            task.cancel()
+        for item in job.items:
+            if item["status"] not in ("stored", "failed"):
+                job.update(item, "interrupted")
+        raise
+    except Exception as e:
+        print(f"[bulk_ingest] job {job.id} aborted: {e}")
+        for task in (*parsers, store):
+            task.cancel()
+        for item in job.items:
+            if item["status"] not in ("stored", "failed"):
+                job.fail(item, e)
+    finally:
+        job.finish(status)
+        shutil.rmtree(job.workdir, ignore_errors=True)
+        await _persist(job)
+        progress = job.progress()
+        print(f"[bulk_ingest] job {job.id}: {progress['counts']} in {progress['elapsed_seconds']}s "
+              f"({progress['resumes_per_minute']} resumes/min)")
+
+
+async def get_ingest_progress(job_id: str) -> dict:
+    job = _jobs.get(job_id)
+    if job:
+        return job.progress()
+
+    if not ObjectId.is_valid(job_id):
+        raise HTTPException(status_code=400, detail="Invalid job_id")
+    checkpoint = await resume_ingest_jobs_collection.find_one({"_id": ObjectId(job_id)})
+    if not checkpoint:
+        raise HTTPException(status_code=404, detail="Ingestion job not found")
+    checkpoint.pop("_id")
+    if checkpoint["status"] == "running" and checkpoint.get("updated_at", 0) < time.time() - STALE_CHECKPOINT_SECONDS:
+        checkpoint["status"] = "interrupted"
+    return checkpoint
+
+
+async def shutdown_bulk_ingest():
+    """Shutdown hook: cancels running jobs, which checkpoint themselves as interrupted."""
+    tasks = list(_running_tasks)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def mark_stale_ingest_jobs():
+    """Startup hook: marks checkpoints left "running" by a worker that died as interrupted."""
+    try:
+        result = await resume_ingest_jobs_collection.update_many(
+            {"status": "running", "updated_at": {"$lt": time.time() - STALE_CHECKPOINT_SECONDS}},
+            {"$set": {"status": "interrupted"}},
+        )
+    except PyMongoError as e:
+        print(f"[bulk_ingest] could not check for stale ingestion jobs: {e}")
+        return
+    if result.modified_count:
+        print(f"[bulk_ingest] marked {result.modified_count} stale ingestion job(s) as interrupted")
+
+
+def get_bulk_ingest_stats():
+    return {
+        **bulk_ingest_stats,
+        "running_jobs": sum(1 for job in _jobs.values() if job.status == "running"),
+    }
@@ -2,7 +2,11 @@ from fastapi import FastAPI, File, UploadFile, HTTPException, Body
 from pydantic import BaseModel, Field, EmailStr
 from typing import List, Optional
 from google.genai import types
-from config import client
+from services.llm_gateway import generate_structured
+from services.llm_admission import PRIORITY_DEFAULT
+from services.prompt_context import build_prompt_context
+from utils.fingerprint import fingerprint
+from utils.singleflight import SingleFlight
 
 
 
@@ -112,13 +116,7 @@ class AssessmentResult(BaseModel):
 
 
 
-async def assess_candidate_fitment(
-    job_desc: JobDescription, resume_doc: ResumeDocument
-) -> AssessmentResult:
-    try:
-        job_desc_json = job_desc.model_dump_json()
-        resume_json = resume_doc.model_dump_json()
-        prompt = f"""
+FITMENT_PROMPT = """
 Evaluate candidate fitment for the given job description and resume JSON.
 
 Return output strictly as valid JSON conforming to the following schema:
@@ -144,14 +142,63 @@ Instructions:
 - Do not include extra commentary or text outside the JSON.
 
 """
-        response = client.models.generate_content(
-        model="gemini-2.5-flash",
-        contents=f"""Job Description: {job_desc_json} Candidate Resume: {resume_json}""",
+
+# Part of every fitment fingerprint: editing the prompt or the result schema
+# retires previously cached assessments (see services/fitment_cache.py).
+FITMENT_PROMPT_VERSION = fingerprint(FITMENT_PROMPT, AssessmentResult.model_json_schema())[:16]
+
+
+def _normalize(value):
+    if isinstance(value, dict):
+        return {k: _normalize(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_normalize(v) for v in value]
+    if isinstance(value, str):
+        return " ".join(value.split())
+    return value
+
+
+def fitment_fingerprint(job_desc, resume_doc) -> str:
+    """Identity of a fitment request: normalised JD + resume JSON and prompt version."""
+    return fingerprint(
+        FITMENT_PROMPT_VERSION,
+        _normalize(job_desc.model_dump(mode="json")),
+        _normalize(resume_doc.model_dump(mode="json")),
+    )
+
+
+# Re-assess clicks and retries for a pair still being scored share one Gemini call
+fitment_flight = SingleFlight("assess_fitment")
+
+
+async def assess_candidate_fitment(
+    job_desc: JobDescription, resume_doc: ResumeDocument, priority: str = PRIORITY_DEFAULT
+) -> AssessmentResult:
+    return await fitment_flight.do(
+        fitment_fingerprint(job_desc, resume_doc),
+        lambda: _assess_candidate_fitment(job_desc, resume_doc, priority),
+    )
+
+
+async def _assess_candidate_fitment(
+    job_desc: JobDescription, resume_doc: ResumeDocument, priority: str
+) -> AssessmentResult:
+    try:
+        contents = build_prompt_context(
+            {"Job Description": job_desc.model_dump(), "Candidate Resume": resume_doc.model_dump()},
+            call_site="assess_fitment",
+        )
+        return await generate_structured(
+        AssessmentResult,
+        contents=contents,
         config=types.GenerateContentConfig(
-        thinking_config=types.ThinkingConfig(thinking_budget=1),system_instruction=prompt,response_mime_type="application/json"),
+        thinking_config=types.ThinkingConfig(thinking_budget=1),system_instruction=FITMENT_PROMPT),
+        timeout=60,
+        call_site="assess_fitment",
+        priority=priority,
         )
-        print("gemini response, candidate fit: ", response.text)
-        return AssessmentResult.model_validate_json(response.text)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Assessment failed: {str(e)}")
 
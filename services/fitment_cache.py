@@ -0,0 +1,73 @@
+import os
+import time
+from config import assessments_collection
+from services.candidate_assessment import FITMENT_PROMPT_VERSION
+
+
+# Memoised fitment assessments. Every stored assessment carries a fingerprint
+# of the normalised resume + JD JSON and FITMENT_PROMPT_VERSION, so a repeat
+# assess request for the same pair reuses the newest assessment younger than
+# FITMENT_CACHE_TTL_SECONDS instead of re-scoring it with Gemini. The same
+# content can arrive under another resume_id/job_id (a re-uploaded resume, a
+# JD posted twice); that pair gets its own copy of the scores with
+# `cached_from` pointing at the original, so assessment ids never cross
+# applications. The TTL counts from when the scores were produced (scored_at).
+
+FITMENT_CACHE_TTL_SECONDS = int(os.getenv("FITMENT_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+
+fitment_cache_stats = {"hits": 0, "misses": 0, "expired": 0, "bypassed": 0, "copied": 0}
+
+
+async def find_cached_assessment(fitment_fp: str):
+    """
+    Returns the newest stored assessment document for this fingerprint that is
+    still within the TTL, or None.
+    """
+    doc = await assessments_collection.find_one(
+        {"fitment_fingerprint": fitment_fp},
+        sort=[("created_at", -1)],
+    )
+    if not doc:
+        fitment_cache_stats["misses"] += 1
+        return None
+    if doc.get("scored_at", doc.get("created_at", 0)) < time.time() - FITMENT_CACHE_TTL_SECONDS:
+        fitment_cache_stats["expired"] += 1
+        return None
+
+    fitment_cache_stats["hits"] += 1
+    return doc
+
+
+async def reuse_cached_assessment(cached: dict, resume_id: str, job_id: str) -> dict:
+    """
+    Returns `cached` when it belongs to this resume/job pair; otherwise stores
+    and returns a copy of it for the pair.
+    """
+    if cached.get("resume_id") == resume_id and cached.get("job_id") == job_id:
+        return cached
+    copy = {key: value for key, value in cached.items() if key not in ("_id", "cached_from")}
+    copy.update({
+        "resume_id": resume_id,
+        "job_id": job_id,
+        "cached_from": cached.get("cached_from", cached["_id"]),
+        "scored_at": cached.get("scored_at", cached.get("created_at")),
+        "created_at": time.time(),
+    })
+    result = await assessments_collection.insert_one(copy)
+    copy["_id"] = result.inserted_id
+    fitment_cache_stats["copied"] += 1
+    return copy
+
+
+def record_bypass():
+    fitment_cache_stats["bypassed"] += 1
+
+
+def get_fitment_cache_stats():
+    lookups = fitment_cache_stats["hits"] + fitment_cache_stats["misses"] + fitment_cache_stats["expired"]
+    return {
+        **fitment_cache_stats,
+        "ttl_seconds": FITMENT_CACHE_TTL_SECONDS,
+        "prompt_version": FITMENT_PROMPT_VERSION,
+        "hit_rate": round(fitment_cache_stats["hits"] / lookups, 4) if lookups else 0.0,
+    }
@@ -0,0 +1,208 @@
+import asyncio
+import os
+from collections import OrderedDict
+from datetime import datetime
+from bson import ObjectId, json_util
+from fastapi import HTTPException
+from config import interviews_collection, resumes_collection
+from services.llm_gateway import send_chat_message
+from services.jd_cache import get_cached_jd
+
+
+# Server-side state for live interviews. The resume/JD prompt prefix is built
+# once when a scheduled interview starts and persisted on its
+# interviews_collection document together with the turns, so each
+# next-question call only carries the newest answer. Workers keep the
+# assembled chat history in memory and rehydrate it from Mongo on a miss.
+# session.version (the number of recorded turns) is checked before a cached
+# session is used and guards every write, so a worker holding a stale copy
+# reloads instead of pairing an answer with the wrong question.
+
+MAX_CACHED_SESSIONS = int(os.getenv("INTERVIEW_SESSION_CACHE_SIZE", "1000"))
+
+_INTERNAL_FIELDS = ["_id", "original_filename", "raw_text", "user_id"]
+
+
+class InterviewSession:
+    def __init__(self, interview_id: str, system_prompt: str, context: str, turns=None, pending_question=None, version: int = 0):
+        self.interview_id = interview_id
+        self.pending_question = pending_question
+        self.version = version
+        self.lock = asyncio.Lock()
+        self.history = [
+            {"role": "model", "parts": [{"text": system_prompt}]},
+            {"role": "user", "parts": [{"text": context}]},
+        ]
+        for turn in turns or []:
+            self._append_turn(turn)
+
+    def _append_turn(self, turn: dict):
+        self.history.append({"role": "model", "parts": [{"text": turn["question"]}]})
+        self.history.append({"role": "user", "parts": [{"text": f"Answer [{turn['timestamp']}]: {turn['answer']}"}]})
+
+    async def ask(self, duration_seconds: int) -> str:
+        # The elapsed-time hint is only sent with this turn, not kept in history
+        response = await send_chat_message(
+            f"Interview elapsed time: {duration_seconds} seconds. Generate the next interview question for the candidate.",
+            history=self.history,
+            timeout=20,
+            call_site="session_next_question",
+            hedge=True
+        )
+        return response.text
+
+
+_sessions = OrderedDict()
+# Serializes start_session per interview within this worker
+_start_locks = {}
+
+
+def _remember(session: InterviewSession):
+    _sessions[session.interview_id] = session
+    _sessions.move_to_end(session.interview_id)
+    while len(_sessions) > MAX_CACHED_SESSIONS:
+        _sessions.popitem(last=False)
+
+
+async def _load_interview(interview_id: str):
+    if not ObjectId.is_valid(interview_id):
+        raise HTTPException(status_code=400, detail="Invalid interview_session_id")
+    interview = await interviews_collection.find_one({"_id": ObjectId(interview_id)})
+    if not interview:
+        raise HTTPException(status_code=404, detail="Interview session not found")
+    return interview
+
+
+async def _build_context(interview: dict) -> str:
+    resume_id, job_id = interview.get("resume_id"), interview.get("job_id")
+    if not ObjectId.is_valid(resume_id) or not ObjectId.is_valid(job_id):
+        raise HTTPException(status_code=400, detail="Interview has invalid resume_id or job_id")
+
+    resume_doc = await resumes_collection.find_one({"_id": ObjectId(resume_id)})
+    if not resume_doc:
+        raise HTTPException(status_code=404, detail="Resume not found")
+    job_doc = await get_cached_jd(job_id)
+    if not job_doc:
+        raise HTTPException(status_code=404, detail="Job description not found")
+
+    for key in _INTERNAL_FIELDS:
+        resume_doc.pop(key, None)
+        job_doc.pop(key, None)
+
+    context = (
+        f"Candidate resume:\n{json_util.dumps(resume_doc)}\n"
+        f"Job description:\n{json_util.dumps(job_doc)}\n"
+        f"Difficulty: {interview.get('difficulty')}"
+    )
+    if interview.get("custom_instructions"):
+        context += f"\nInterviewer instructions: {interview['custom_instructions']}"
+    return context
+
+
+async def start_session(interview_id: str, system_prompt: str) -> InterviewSession:
+    """
+    Creates the session for a scheduled interview and generates its first
+    question. Starting an already started interview returns the existing session.
+    """
+    lock = _start_locks.setdefault(interview_id, asyncio.Lock())
+    try:
+        async with lock:
+            return await _start_session(interview_id, system_prompt)
+    finally:
+        if not lock.locked() and _start_locks.get(interview_id) is lock:
+            del _start_locks[interview_id]
+
+
+async def _start_session(interview_id: str, system_prompt: str) -> InterviewSession:
+    existing = await get_session(interview_id, system_prompt, required=False)
+    if existing:
+        return existing
+
+    interview = await _load_interview(interview_id)
+    session = InterviewSession(interview_id, system_prompt, await _build_context(interview))
+    async with session.lock:
+        session.pending_question = await session.ask(0)
+        # Another worker may have started it meanwhile; only the first start is kept
+        result = await interviews_collection.update_one(
+            {"_id": ObjectId(interview_id), "session": {"$exists": False}},
+            {"$set": {
+                "session": {
+                    "context": session.history[1]["parts"][0]["text"],
+                    "turns": [],
+                    "pending_question": session.pending_question,
+                    "version": 0,
+                    "started_at": datetime.utcnow().isoformat(),
+                },
+                "status": "in_progress",
+            }}
+        )
+    if result.matched_count == 0:
+        return await get_session(interview_id, system_prompt)
+    _remember(session)
+    return session
+
+
+async def get_session(interview_id: str, system_prompt: str, required: bool = True):
+    session = _sessions.get(interview_id)
+    if session:
+        # Another worker may have recorded turns since this copy was cached
+        current = await interviews_collection.find_one({"_id": ObjectId(interview_id)}, {"session.version": 1})
+        if current and current.get("session", {}).get("version") == session.version:
+            _sessions.move_to_end(interview_id)
+            return session
+        _sessions.pop(interview_id, None)
+
+    interview = await _load_interview(interview_id)
+    state = interview.get("session")
+    if not state:
+        if required:
+            raise HTTPException(status_code=409, detail="Interview session has not been started")
+        return None
+
+    session = InterviewSession(
+        interview_id,
+        system_prompt,
+        state["context"],
+        turns=state.get("turns", []),
+        pending_question=state.get("pending_question"),
+        # Sessions written before versioning: the turn count is the version
+        version=state.get("version", len(state.get("turns", []))),
+    )
+    _remember(session)
+    return session
+
+
+async def answer_and_ask(session: InterviewSession, answer: str, timestamp: str, duration_seconds: int) -> str:
+    """
+    Records the candidate's answer to the pending question and returns the
+    next one. Only the new turn is written to Mongo.
+    """
+    async with session.lock:
+        turn = {"question": session.pending_question or "", "answer": answer, "timestamp": timestamp}
+        session._append_turn(turn)
+        try:
+            next_question = await session.ask(duration_seconds)
+        except Exception:
+            # Keep memory consistent with Mongo so the client can retry the turn
+            del session.history[-2:]
+            raise
+        result = await interviews_collection.update_one(
+            {
+                "_id": ObjectId(session.interview_id),
+                "$or": [
+                    {"session.version": session.version},
+                    {"session.version": {"$exists": False}, "session.turns": {"$size": session.version}},
+                ],
+            },
+            {
+                "$push": {"session.turns": turn},
+                "$set": {"session.pending_question": next_question, "session.version": session.version + 1},
+            }
+        )
+        if result.matched_count == 0:
+            # A turn was recorded elsewhere since this copy was loaded; drop it and let the client retry
+            _sessions.pop(session.interview_id, None)
+            raise HTTPException(status_code=409, detail="Interview session changed, please retry")
+        session.pending_question = next_question
+        session.version += 1
+        return next_question
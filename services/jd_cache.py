@@ -0,0 +1,116 @@
+import asyncio
+import copy
+import os
+import time
+from collections import OrderedDict
+from bson import ObjectId
+from pymongo.errors import PyMongoError
+from config import jds_collection
+from utils.singleflight import SingleFlight
+
+
+# Per-worker read-through cache of job description documents. Entries expire
+# after JD_CACHE_TTL_SECONDS and the least recently used are evicted beyond
+# JD_CACHE_SIZE. Writers call invalidate_jd(); that only reaches this worker,
+# so with several workers either rely on the TTL or set
+# JD_CACHE_CHANGE_STREAM=true (replica set required) to have every worker
+# evict on any update/replace/delete of a JD.
+
+JD_CACHE_SIZE = int(os.getenv("JD_CACHE_SIZE", "512"))
+JD_CACHE_TTL_SECONDS = float(os.getenv("JD_CACHE_TTL_SECONDS", "300"))
+JD_CACHE_CHANGE_STREAM = os.getenv("JD_CACHE_CHANGE_STREAM", "false").lower() == "true"
+
+_entries = OrderedDict()
+# Bumped on every invalidation; a load that raced with one is not cached
+_generation = 0
+_watcher = None
+
+jd_load_flight = SingleFlight("jd_cache_load")
+
+jd_cache_stats = {"hits": 0, "misses": 0, "expired": 0, "evictions": 0, "invalidations": 0, "remote_invalidations": 0}
+
+
+def _store(key: str, doc: dict):
+    _entries[key] = (time.monotonic() + JD_CACHE_TTL_SECONDS, doc)
+    _entries.move_to_end(key)
+    while len(_entries) > JD_CACHE_SIZE:
+        _entries.popitem(last=False)
+        jd_cache_stats["evictions"] += 1
+
+
+async def _load(key: str):
+    generation = _generation
+    doc = await jds_collection.find_one({"_id": ObjectId(key)})
+    if doc is not None and generation == _generation:
+        _store(key, doc)
+    return doc
+
+
+async def get_cached_jd(job_id):
+    """
+    Returns a copy of the JD document (callers may mutate it), or None if the
+    job does not exist. Misses are not cached.
+    """
+    key = str(job_id)
+    entry = _entries.get(key)
+    if entry:
+        expires_at, doc = entry
+        if expires_at > time.monotonic():
+            jd_cache_stats["hits"] += 1
+            _entries.move_to_end(key)
+            return copy.deepcopy(doc)
+        del _entries[key]
+        jd_cache_stats["expired"] += 1
+    else:
+        jd_cache_stats["misses"] += 1
+
+    doc = await jd_load_flight.do(key, lambda: _load(key))
+    return copy.deepcopy(doc)
+
+
+def invalidate_jd(job_id, remote: bool = False):
+    global _generation
+    _generation += 1
+    _entries.pop(str(job_id), None)
+    jd_cache_stats["remote_invalidations" if remote else "invalidations"] += 1
+
+
+async def _watch_jd_changes():
+    pipeline = [{"$match": {"operationType": {"$in": ["update", "replace", "delete"]}}}]
+    while True:
+        try:
+            async with await jds_collection.watch(pipeline) as stream:
+                async for change in stream:
+                    invalidate_jd(change["documentKey"]["_id"], remote=True)
+        except asyncio.CancelledError:
+            raise
+        except PyMongoError as e:
+            # Missed events while reconnecting: drop everything rather than serve stale JDs
+            print(f"[jd_cache] change stream error, clearing cache: {e}")
+            _entries.clear()
+            await asyncio.sleep(5)
+
+
+async def start_jd_cache_watcher():
+    global _watcher
+    if JD_CACHE_CHANGE_STREAM and _watcher is None:
+        _watcher = asyncio.create_task(_watch_jd_changes())
+
+
+def stop_jd_cache_watcher():
+    global _watcher
+    if _watcher is not None:
+        _watcher.cancel()
+        _watcher = None
+
+
+def get_jd_cache_stats():
+    lookups = jd_cache_stats["hits"] + jd_cache_stats["misses"] + jd_cache_stats["expired"]
+    return {
+        **jd_cache_stats,
+        "size": len(_entries),
+        "max_size": JD_CACHE_SIZE,
+        "ttl_seconds": JD_CACHE_TTL_SECONDS,
+        "change_stream": _watcher is not None and not _watcher.done(),
+        "hit_rate": round(jd_cache_stats["hits"] / lookups, 4) if lookups else 0.0,
+    }
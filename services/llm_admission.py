@@ -0,0 +1,198 @@
+import asyncio
+import heapq
+import itertools
+import os
+import time
+from contextlib import asynccontextmanager
+from fastapi import HTTPException
+
+
+# Central admission control for Gemini calls. Every call made through
+# services/llm_gateway.py first waits here for
+#   1. a concurrency slot, granted strictly by priority lane, where the limit
+#      adapts AIMD-style (additive increase on healthy calls, multiplicative
+#      decrease on 429s and slow responses), and
+#   2. a token from a bucket sized to the project's request quota,
+# so bursts of uploads and background assessments queue up instead of
+# tripping quota and failing live interviews. A share of the bucket
+# (LLM_INTERACTIVE_TOKEN_RESERVE) is only spent by the interactive lane, and
+# the time spent queueing comes out of the caller's timeout.
+
+PRIORITY_INTERACTIVE = "interactive"   # live interview turns
+PRIORITY_DEFAULT = "default"           # user-facing uploads and assessments
+PRIORITY_BATCH = "batch"               # background assessments
+PRIORITY_LANES = [PRIORITY_INTERACTIVE, PRIORITY_DEFAULT, PRIORITY_BATCH]
+
+RATE_LIMIT_RPM = float(os.getenv("LLM_RATE_LIMIT_RPM", "1000"))
+RATE_LIMIT_BURST = float(os.getenv("LLM_RATE_LIMIT_BURST", "20"))
+CONCURRENCY_INITIAL = float(os.getenv("LLM_CONCURRENCY_INITIAL", "16"))
+CONCURRENCY_MIN = float(os.getenv("LLM_CONCURRENCY_MIN", "1"))
+CONCURRENCY_MAX = float(os.getenv("LLM_CONCURRENCY_MAX", "128"))
+LATENCY_TARGET_SECONDS = float(os.getenv("LLM_LATENCY_TARGET_SECONDS", "20"))
+QUEUE_TIMEOUT_SECONDS = float(os.getenv("LLM_QUEUE_TIMEOUT_SECONDS", "60"))
+INTERACTIVE_TOKEN_RESERVE = float(os.getenv("LLM_INTERACTIVE_TOKEN_RESERVE", "0.25"))
+
+
+class TokenBucket:
+    def __init__(self, rate_per_second: float, capacity: float):
+        self.rate = rate_per_second
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, reserve: float = 0.0, deadline: float = None) -> bool:
+        """
+        Takes one token, leaving `reserve` tokens in the bucket for others.
+        Returns False instead of waiting past `deadline` (time.monotonic()).
+        """
+        reserve = min(reserve, self.capacity - 1)
+        while True:
+            self._refill()
+            if self.tokens >= 1 + reserve:
+                self.tokens -= 1
+                return True
+            delay = (1 + reserve - self.tokens) / self.rate
+            if deadline is not None and time.monotonic() + delay > deadline:
+                return False
+            await asyncio.sleep(delay)
+
+
+class AdmissionController:
+    def __init__(self):
+        self.limit = CONCURRENCY_INITIAL
+        self.in_flight = 0
+        self.bucket = TokenBucket(RATE_LIMIT_RPM / 60.0, RATE_LIMIT_BURST)
+        # Tokens lower lanes leave for interactive calls
+        self.interactive_reserve = RATE_LIMIT_BURST * INTERACTIVE_TOKEN_RESERVE
+        self._waiters = []
+        self._seq = itertools.count()
+        self.stats = {
+            lane: {"queued": 0, "admitted": 0, "rejected": 0, "wait_seconds_total": 0.0, "wait_seconds_max": 0.0}
+            for lane in PRIORITY_LANES
+        }
+        self.signals = {"throttled": 0, "slow": 0, "ok": 0}
+
+    def _has_capacity(self):
+        return self.in_flight < max(1, int(self.limit))
+
+    def _wake_next(self):
+        while self._waiters and self._has_capacity():
+            _, _, lane, future = heapq.heappop(self._waiters)
+            if future.done():
+                continue
+            self.in_flight += 1
+            self.stats[lane]["queued"] -= 1
+            future.set_result(None)
+
+    def _reject(self, lane):
+        self.stats[lane]["rejected"] += 1
+        return HTTPException(status_code=503, detail="LLM capacity exhausted, please retry shortly",
+                             headers={"Retry-After": "5"})
+
+    async def acquire(self, priority: str, timeout: float = None):
+        """
+        Waits for a slot and a rate-limit token, for at most `timeout` seconds
+        (capped at QUEUE_TIMEOUT_SECONDS); raises 503 when that runs out.
+        """
+        lane = priority if priority in self.stats else PRIORITY_DEFAULT
+        started = time.monotonic()
+        max_wait = min(timeout, QUEUE_TIMEOUT_SECONDS) if timeout is not None else QUEUE_TIMEOUT_SECONDS
+        deadline = started + max_wait
+
+        if self._has_capacity() and not self._waiters:
+            self.in_flight += 1
+        else:
+            future = asyncio.get_running_loop().create_future()
+            entry = (PRIORITY_LANES.index(lane), next(self._seq), lane, future)
+            heapq.heappush(self._waiters, entry)
+            self.stats[lane]["queued"] += 1
+            try:
+                await asyncio.wait_for(asyncio.shield(future), timeout=max(0.0, deadline - time.monotonic()))
+            except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+                if future.done() and not future.cancelled():
+                    # Slot was granted just as we gave up; hand it on
+                    self.in_flight -= 1
+                    self._wake_next()
+                else:
+                    future.cancel()
+                    self.stats[lane]["queued"] -= 1
+                if isinstance(e, asyncio.CancelledError):
+                    raise
+                raise self._reject(lane)
+
+        reserve = 0.0 if lane == PRIORITY_INTERACTIVE else self.interactive_reserve
+        try:
+            admitted = await self.bucket.acquire(reserve, deadline)
+        except BaseException:
+            self.release()
+            raise
+        if not admitted:
+            self.release()
+            raise self._reject(lane)
+
+        waited = time.monotonic() - started
+        self.stats[lane]["admitted"] += 1
+        self.stats[lane]["wait_seconds_total"] += waited
+        self.stats[lane]["wait_seconds_max"] = max(self.stats[lane]["wait_seconds_max"], waited)
+
+    def release(self, latency: float = None, throttled: bool = False):
+        self.in_flight -= 1
+        if throttled:
+            self.signals["throttled"] += 1
+            self.limit = max(CONCURRENCY_MIN, self.limit / 2)
+        elif latency is not None and latency > LATENCY_TARGET_SECONDS:
+            self.signals["slow"] += 1
+            self.limit = max(CONCURRENCY_MIN, self.limit * 0.9)
+        elif latency is not None:
+            self.signals["ok"] += 1
+            self.limit = min(CONCURRENCY_MAX, self.limit + 1 / self.limit)
+        self._wake_next()
+
+    @asynccontextmanager
+    async def slot(self, priority: str = PRIORITY_DEFAULT, timeout: float = None):
+        """
+        Holds one admitted LLM call, queueing for at most `timeout` seconds.
+        The body reports the outcome through the yielded dict: set `throttled`
+        on a 429; latency is measured here.
+        """
+        await self.acquire(priority, timeout)
+        outcome = {"throttled": False}
+        started = time.monotonic()
+        try:
+            yield outcome
+        finally:
+            self.release(latency=time.monotonic() - started, throttled=outcome["throttled"])
+
+    def snapshot(self):
+        lanes = {}
+        for lane, lane_stats in self.stats.items():
+            admitted = lane_stats["admitted"]
+            lanes[lane] = {
+                "queue_depth": lane_stats["queued"],
+                "admitted": admitted,
+                "rejected": lane_stats["rejected"],
+                "avg_wait_seconds": round(lane_stats["wait_seconds_total"] / admitted, 4) if admitted else 0.0,
+                "max_wait_seconds": round(lane_stats["wait_seconds_max"], 4),
+            }
+        self.bucket._refill()
+        return {
+            "concurrency_limit": round(self.limit, 2),
+            "in_flight": self.in_flight,
+            "tokens_available": round(self.bucket.tokens, 2),
+            "interactive_token_reserve": round(self.interactive_reserve, 2),
+            "rate_limit_rpm": RATE_LIMIT_RPM,
+            "signals": dict(self.signals),
+            "lanes": lanes,
+        }
+
+
+admission = AdmissionController()
+
+
+def get_admission_stats():
+    return admission.snapshot()
@@ -0,0 +1,196 @@
+import asyncio
+import os
+from functools import lru_cache
+from fastapi import HTTPException
+from google.genai import errors, types
+from pydantic import ValidationError
+from services.providers import gemini_provider
+from services.llm_hedging import hedged
+from services.llm_admission import admission, PRIORITY_DEFAULT, PRIORITY_INTERACTIVE
+
+
+# Shared async gateway for every Gemini call. All call sites go through the
+# SDK's async surface (client.aio, behind services/providers.py) so a slow
+# generation only suspends the request that is waiting on it instead of the
+# whole event loop.
+
+DEFAULT_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
+DEFAULT_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "60"))
+STRUCTURED_OUTPUT_MAX_REASKS = int(os.getenv("STRUCTURED_OUTPUT_MAX_REASKS", "1"))
+MAX_THROTTLE_RETRIES = int(os.getenv("LLM_MAX_THROTTLE_RETRIES", "2"))
+
+structured_output_stats = {"calls": 0, "valid_first_pass": 0, "reasks": 0, "failures": 0}
+
+# Gemini only accepts a few string formats in response schemas; pydantic emits
+# others (e.g. "email" for EmailStr) that would get the request rejected.
+_SUPPORTED_STRING_FORMATS = {"date-time", "date", "time"}
+
+
+async def _with_timeout(awaitable, timeout, call_site):
+    try:
+        return await asyncio.wait_for(awaitable, timeout=timeout or DEFAULT_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail=f"Gemini call timed out ({call_site})")
+
+
+def _quota_exhausted(call_site):
+    return HTTPException(status_code=503, detail=f"Gemini quota exhausted ({call_site}), please retry shortly",
+                         headers={"Retry-After": "10"})
+
+
+async def _admitted(call, priority, timeout, call_site):
+    """
+    Runs `call()` (a coroutine factory) inside an admission slot. A 429 halves
+    the concurrency limit and is retried with backoff; if quota stays
+    exhausted the caller gets a 503 instead of a generic 500. `timeout` covers
+    the whole call, including time queued for admission and backoff.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + (timeout or DEFAULT_TIMEOUT_SECONDS)
+
+    def remaining():
+        left = deadline - loop.time()
+        if left <= 0:
+            raise HTTPException(status_code=504, detail=f"Gemini call timed out ({call_site})")
+        return left
+
+    for attempt in range(MAX_THROTTLE_RETRIES + 1):
+        async with admission.slot(priority, timeout=remaining()) as outcome:
+            try:
+                return await _with_timeout(call(), remaining(), call_site)
+            except errors.APIError as e:
+                if e.code != 429:
+                    raise
+                outcome["throttled"] = True
+        await asyncio.sleep(min(2 ** attempt, remaining()))
+    raise _quota_exhausted(call_site)
+
+
+async def generate_content(contents, config=None, model=DEFAULT_MODEL, timeout=None, call_site="generate_content",
+                           priority=PRIORITY_DEFAULT, hedge=False):
+    """
+    Single-shot generation (client.aio.models.generate_content),
+    bounded by `timeout` seconds. `hedge` opts into hedged requests.
+    """
+    def attempt(model_name):
+        return _admitted(
+            lambda: gemini_provider.generate_content(model_name, contents, config),
+            priority,
+            timeout,
+            call_site,
+        )
+
+    if hedge:
+        return await hedged(attempt, model, call_site)
+    return await attempt(model)
+
+
+async def send_chat_message(message, history, config=None, model=DEFAULT_MODEL, timeout=None, call_site="chat",
+                            priority=PRIORITY_INTERACTIVE, hedge=False):
+    """
+    Creates an async chat seeded with `history` and sends `message`,
+    bounded by `timeout` seconds. `hedge` opts into hedged requests.
+    """
+    def attempt(model_name):
+        return _admitted(
+            lambda: gemini_provider.send_chat(model_name, history, message, config),
+            priority,
+            timeout,
+            call_site,
+        )
+
+    if hedge:
+        return await hedged(attempt, model, call_site)
+    return await attempt(model)
+
+
+async def stream_chat_message(message, history, config=None, model=DEFAULT_MODEL, timeout=None, call_site="chat_stream",
+                              priority=PRIORITY_INTERACTIVE):
+    """
+    Like send_chat_message, but yields the reply text chunk by chunk as Gemini
+    produces it. `timeout` bounds the wait for admission and for each chunk,
+    including the first.
+    The admission slot is held until the stream is exhausted or closed.
+    """
+    async with admission.slot(priority, timeout=timeout or DEFAULT_TIMEOUT_SECONDS) as outcome:
+        try:
+            stream = await _with_timeout(gemini_provider.stream_chat(model, history, message, config), timeout, call_site)
+        except errors.APIError as e:
+            if e.code != 429:
+                raise
+            outcome["throttled"] = True
+            raise _quota_exhausted(call_site)
+
+        chunks = stream.__aiter__()
+        while True:
+            try:
+                chunk = await _with_timeout(chunks.__anext__(), timeout, call_site)
+            except StopAsyncIteration:
+                return
+            if chunk.text:
+                yield chunk.text
+
+
+def _strip_unsupported_formats(schema):
+    if isinstance(schema, dict):
+        return {
+            key: _strip_unsupported_formats(value)
+            for key, value in schema.items()
+            if not (key == "format" and isinstance(value, str) and value not in _SUPPORTED_STRING_FORMATS)
+        }
+    if isinstance(schema, list):
+        return [_strip_unsupported_formats(item) for item in schema]
+    return schema
+
+
+@lru_cache(maxsize=None)
+def response_json_schema(model_cls):
+    """JSON schema for `model_cls` in the subset Gemini's constrained decoding accepts."""
+    return _strip_unsupported_formats(model_cls.model_json_schema())
+
+
+async def generate_structured(model_cls, contents, config=None, model=DEFAULT_MODEL, timeout=None,
+                              call_site="generate_structured", max_reasks=STRUCTURED_OUTPUT_MAX_REASKS,
+                              priority=PRIORITY_DEFAULT):
+    """
+    Generates JSON constrained to the schema of the Pydantic `model_cls` and
+    returns a validated instance. If validation still fails, the model is
+    re-asked with the validation errors up to `max_reasks` times before a 502.
+    """
+    config = (config or types.GenerateContentConfig()).model_copy(update={
+        "response_mime_type": "application/json",
+        "response_json_schema": response_json_schema(model_cls),
+    })
+    structured_output_stats["calls"] += 1
+
+    conversation = contents
+    for attempt in range(max_reasks + 1):
+        response = await generate_content(conversation, config=config, model=model, timeout=timeout,
+                                          call_site=call_site, priority=priority)
+        try:
+            result = model_cls.model_validate_json(response.text or "")
+            if attempt == 0:
+                structured_output_stats["valid_first_pass"] += 1
+            return result
+        except ValidationError as e:
+            error = "; ".join(f"{'.'.join(map(str, err['loc'])) or 'root'}: {err['msg']}" for err in e.errors())
+            print(f"[{call_site}] structured output failed validation (attempt {attempt + 1}): {error}")
+
+        if attempt < max_reasks:
+            structured_output_stats["reasks"] += 1
+            if isinstance(conversation, str):
+                conversation = [types.Content(role="user", parts=[types.Part(text=conversation)])]
+            conversation = conversation + [
+                types.Content(role="model", parts=[types.Part(text=response.text or "")]),
+                types.Content(role="user", parts=[types.Part(text=(
+                    "Your previous output did not validate against the response schema:\n"
+                    f"{error}\nReturn the corrected JSON only."
+                ))]),
+            ]
+
+    structured_output_stats["failures"] += 1
+    raise HTTPException(status_code=502, detail=f"Gemini returned invalid structured output ({call_site}): {error}")
+
+
+def get_structured_output_stats():
+    return dict(structured_output_stats)
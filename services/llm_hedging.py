@@ -0,0 +1,101 @@
+import asyncio
+import os
+import time
+from collections import deque
+
+
+# Hedged requests for latency-critical Gemini call sites. When a call has not
+# finished within the call site's recent p-th percentile latency, a second
+# request is fired (optionally at a lighter LLM_HEDGE_MODEL); whichever
+# succeeds first wins and the other is cancelled. Call sites opt in with
+# hedge=True in services/llm_gateway.py and LLM_HEDGING_ENABLED=true.
+
+HEDGING_ENABLED = os.getenv("LLM_HEDGING_ENABLED", "false").lower() == "true"
+HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "0.9"))
+HEDGE_MODEL = os.getenv("LLM_HEDGE_MODEL") or None
+HEDGE_DEFAULT_DELAY_SECONDS = float(os.getenv("LLM_HEDGE_DEFAULT_DELAY_SECONDS", "4"))
+HEDGE_MIN_SAMPLES = 20
+LATENCY_WINDOW = 200
+
+_latencies = {}
+hedge_stats = {}
+
+
+def _site_stats(call_site):
+    return hedge_stats.setdefault(call_site, {"calls": 0, "hedged": 0, "primary_wins": 0, "hedge_wins": 0})
+
+
+def hedge_delay(call_site) -> float:
+    """Recent HEDGE_PERCENTILE latency of this call site, or the default until enough samples exist."""
+    samples = _latencies.get(call_site)
+    if not samples or len(samples) < HEDGE_MIN_SAMPLES:
+        return HEDGE_DEFAULT_DELAY_SECONDS
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * HEDGE_PERCENTILE))]
+
+
+def _record_latency(call_site, seconds):
+    _latencies.setdefault(call_site, deque(maxlen=LATENCY_WINDOW)).append(seconds)
+
+
+def _track_primary(call_site, started, task):
+    # Every successful primary feeds the delay estimate, whichever attempt won
+    if not task.cancelled() and task.exception() is None:
+        _record_latency(call_site, time.monotonic() - started)
+
+
+async def hedged(attempt, model, call_site):
+    """
+    `attempt(model)` returns a coroutine performing one call. Runs it, and if
+    it is still pending after hedge_delay() (or has already failed) starts a
+    second attempt; returns the first successful result and cancels the other.
+    """
+    started = time.monotonic()
+    if not HEDGING_ENABLED:
+        result = await attempt(model)
+        # Sampled even while disabled so the delay is calibrated when switched on
+        _record_latency(call_site, time.monotonic() - started)
+        return result
+
+    stats = _site_stats(call_site)
+    stats["calls"] += 1
+    primary = asyncio.ensure_future(attempt(model))
+    primary.add_done_callback(lambda task: _track_primary(call_site, started, task))
+    backup = None
+
+    try:
+        await asyncio.wait({primary}, timeout=hedge_delay(call_site))
+        if primary.done() and primary.exception() is None:
+            stats["primary_wins"] += 1
+            return primary.result()
+
+        stats["hedged"] += 1
+        backup = asyncio.ensure_future(attempt(HEDGE_MODEL or model))
+        pending = {backup} if primary.done() else {primary, backup}
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    stats["primary_wins" if task is primary else "hedge_wins"] += 1
+                    return task.result()
+        # Both attempts failed; surface the primary's error
+        return primary.result()
+    finally:
+        if not primary.done():
+            # Cancelled because the hedge won: its latency is at least this long
+            _record_latency(call_site, time.monotonic() - started)
+        for task in (primary, backup):
+            if task is not None and not task.done():
+                task.cancel()
+
+
+def get_hedge_stats():
+    return {
+        call_site: {
+            **stats,
+            "hedge_rate": round(stats["hedged"] / stats["calls"], 4) if stats["calls"] else 0.0,
+            "hedge_win_rate": round(stats["hedge_wins"] / stats["hedged"], 4) if stats["hedged"] else 0.0,
+            "hedge_delay_seconds": round(hedge_delay(call_site), 3),
+        }
+        for call_site, stats in hedge_stats.items()
+    }
@@ -0,0 +1,76 @@
+import os
+import re
+import time
+from config import resume_parse_cache_collection
+from services.parsers import ResumeDocument, RESUME_PARSE_PROMPT_VERSION
+from utils.fingerprint import fingerprint
+
+
+# Content-addressed cache of Gemini resume parses. Entries are keyed by the
+# hash of the extracted PDF text plus RESUME_PARSE_PROMPT_VERSION, so a
+# candidate re-uploading the same PDF skips the LLM call entirely, and any
+# change to the parse prompt or schema naturally misses old entries.
+
+PARSE_CACHE_ENABLED = os.getenv("RESUME_PARSE_CACHE_ENABLED", "true").lower() == "true"
+
+parse_cache_stats = {"hits": 0, "misses": 0, "stores": 0, "invalidated": 0}
+
+
+def resume_text_hash(resume_text: str) -> str:
+    # Whitespace differences between extractions of the same PDF should not miss
+    normalized = re.sub(r"\s+", " ", resume_text).strip()
+    return fingerprint(normalized)
+
+
+def _cache_key(resume_text: str) -> str:
+    return f"{RESUME_PARSE_PROMPT_VERSION}:{resume_text_hash(resume_text)}"
+
+
+async def get_cached_resume(resume_text: str):
+    """Returns the cached ResumeDocument for this text, or None on a miss."""
+    if not PARSE_CACHE_ENABLED:
+        return None
+
+    entry = await resume_parse_cache_collection.find_one({"_id": _cache_key(resume_text)})
+    if not entry:
+        parse_cache_stats["misses"] += 1
+        return None
+
+    parse_cache_stats["hits"] += 1
+    return ResumeDocument.model_validate(entry["parsed"])
+
+
+async def store_cached_resume(resume_text: str, parsed_resume: ResumeDocument):
+    if not PARSE_CACHE_ENABLED:
+        return
+
+    entry = {
+        "_id": _cache_key(resume_text),
+        "text_hash": resume_text_hash(resume_text),
+        "prompt_version": RESUME_PARSE_PROMPT_VERSION,
+        "parsed": parsed_resume.model_dump(),
+        "created_at": time.time(),
+    }
+    await resume_parse_cache_collection.replace_one({"_id": entry["_id"]}, entry, upsert=True)
+    parse_cache_stats["stores"] += 1
+
+
+async def invalidate_resume_parse_cache(all_versions: bool = False) -> int:
+    """
+    Drops cache entries written by an older prompt version (or every entry when
+    `all_versions` is set). Returns the number of deleted entries.
+    """
+    query = {} if all_versions else {"prompt_version": {"$ne": RESUME_PARSE_PROMPT_VERSION}}
+    result = await resume_parse_cache_collection.delete_many(query)
+    parse_cache_stats["invalidated"] += result.deleted_count
+    return result.deleted_count
+
+
+def get_parse_cache_stats():
+    lookups = parse_cache_stats["hits"] + parse_cache_stats["misses"]
+    return {
+        **parse_cache_stats,
+        "enabled": PARSE_CACHE_ENABLED,
+        "prompt_version": RESUME_PARSE_PROMPT_VERSION,
+        "hit_rate": round(parse_cache_stats["hits"] / lookups, 4) if lookups else 0.0,
+    }
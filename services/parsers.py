@@ -1,11 +1,12 @@
 from fastapi import FastAPI, File, UploadFile, HTTPException, Body
 from pydantic import BaseModel, Field, EmailStr
 from typing import List, Optional, Literal
-import pdfplumber
-import io
-from config import client
 from google.genai import types
-import re
+from services.llm_gateway import generate_structured
+from services.llm_admission import PRIORITY_DEFAULT
+from utils.fingerprint import fingerprint
+from utils.singleflight import SingleFlight
+from services.pdf_extraction import extract_pdf_text
 
 class ContactInformation(BaseModel):
     email: Optional[EmailStr] = None
@@ -175,28 +176,14 @@ class JobDescription(BaseModel):
 
 
 
-def extract_json_from_gemini_response(text: str) -> str:
-    """
-    Removes markdown code fences ("```json", "```
-    """
-    # Remove starting code fence (```json\n or ```
-    cleaned = re.sub(r"^```[\w]*\n*", "", text.strip())
-    # Remove ending code fence (```
-    cleaned = re.sub(r"\n*```$", "", cleaned)
-    return cleaned.strip()
+async def extract_text_from_pdf(pdf_file) -> str:
+    # CPU-bound; runs in the bounded process pool (services/pdf_extraction.py)
+    return await extract_pdf_text(pdf_file)
 
 
-def extract_text_from_pdf(pdf_file: bytes) -> str:
-    text = ""
-    try:
-        with pdfplumber.open(io.BytesIO(pdf_file)) as pdf:
-            for page in pdf.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text += page_text + "\n"
-        return text
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Error parsing PDF: {str(e)}")
+# Identical texts submitted while a parse is still running share one Gemini call
+jd_parse_flight = SingleFlight("parse_jd")
+resume_parse_flight = SingleFlight("parse_resume")
 
 
 async def parse_jd_with_gemini(jd_text: str) -> JobDescription:
@@ -204,6 +191,10 @@ async def parse_jd_with_gemini(jd_text: str) -> JobDescription:
     Parses unstructured job description text into structured JobDescription model
     using Gemini API with JSON output.
     """
+    return await jd_parse_flight.do(fingerprint(jd_text), lambda: _parse_jd_with_gemini(jd_text))
+
+
+async def _parse_jd_with_gemini(jd_text: str) -> JobDescription:
     try:
         system_prompt = f"""
 Extract and structure the following job description into this JSON format:
@@ -223,24 +214,23 @@ Extract and structure the following job description into this JSON format:
 
 Please output ONLY the JSON matching the above schema.Write None if specific details are not mentionedd
 """
-        response = client.models.generate_content(
-        model="gemini-2.5-flash",
+        return await generate_structured(
+        JobDescription,
         contents=f"""Job Description Text: {jd_text}""",
         config=types.GenerateContentConfig(
         thinking_config=types.ThinkingConfig(thinking_budget=1),
-        system_instruction=system_prompt))
-        
-        clean_json = extract_json_from_gemini_response(response.text)
-        return JobDescription.parse_raw(clean_json)
+        system_instruction=system_prompt),
+        timeout=45,
+        call_site="parse_jd")
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Gemini job description parsing failed: {str(e)}")
 
 
 
 
-async def parse_resume_with_gemini(resume_text: str) -> ResumeDocument:
-    try:
-        prompt = """
+RESUME_PARSE_PROMPT = """
 You are an expert resume parser. 
 Extract and structure all relevant details from the following resume strictly in this JSON format. 
 If a detail is missing in the resume, return null for that field or an empty array for lists. 
@@ -330,17 +320,31 @@ Only output the filled JSON matching the schema above, with all available fields
 
 """
 
-        response = client.models.generate_content(
-        model="gemini-2.5-flash",
+# Changes whenever the prompt or the ResumeDocument schema changes, so cached
+# parses produced by an older prompt are never served (see services/parse_cache.py).
+RESUME_PARSE_PROMPT_VERSION = fingerprint(RESUME_PARSE_PROMPT, ResumeDocument.model_json_schema())[:16]
+
+
+async def parse_resume_with_gemini(resume_text: str, priority: str = PRIORITY_DEFAULT) -> ResumeDocument:
+    return await resume_parse_flight.do(
+        fingerprint(RESUME_PARSE_PROMPT_VERSION, resume_text),
+        lambda: _parse_resume_with_gemini(resume_text, priority),
+    )
+
+
+async def _parse_resume_with_gemini(resume_text: str, priority: str) -> ResumeDocument:
+    try:
+        return await generate_structured(
+        ResumeDocument,
         contents=f"""Resume Text: {resume_text}""",
         config=types.GenerateContentConfig(
         thinking_config=types.ThinkingConfig(thinking_budget=1),
-        system_instruction=prompt))
-        
-        # Parse to ResumeDocument
-        print("gemini response: ",response.text)
-        clean_json = extract_json_from_gemini_response(response.text)
-        return ResumeDocument.parse_raw(clean_json)
+        system_instruction=RESUME_PARSE_PROMPT),
+        timeout=60,
+        call_site="parse_resume",
+        priority=priority)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Gemini parsing failed: {str(e)}")
 
@@ -0,0 +1,252 @@
+import asyncio
+import io
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from fastapi import HTTPException
+
+
+# PDF text extraction is pure CPU (hundreds of ms for a multi-page PDF), so it
+# runs in a bounded process pool instead of on the event loop. At most
+# PDF_MAX_PENDING documents may be queued or running per API worker; beyond
+# that uploads get a 503 rather than piling up. Each document is given
+# PDF_EXTRACT_TIMEOUT_SECONDS. A running worker cannot be cancelled, so when
+# one overruns its pool is retired: new work goes to a fresh pool, and the old
+# pool's processes (including the stuck one) are killed once the documents
+# already running there have had their own timeout. A hostile PDF therefore
+# costs one pool restart instead of permanently occupying a worker.
+#
+# Extraction is tiered: pdfium's text layer (fast) is read first, and only
+# when it yields under PDF_MIN_CHARS_PER_PAGE on average do we pay for
+# pdfplumber's layout analysis. Pages are streamed one at a time and stop at
+# PDF_MAX_PAGES / PDF_MAX_CHARS.
+
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", str(min(4, os.cpu_count() or 1))))
+PDF_MAX_PENDING = int(os.getenv("PDF_MAX_PENDING", str(PDF_WORKERS * 4)))
+PDF_EXTRACT_TIMEOUT_SECONDS = float(os.getenv("PDF_EXTRACT_TIMEOUT_SECONDS", "30"))
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", "20"))
+PDF_MAX_CHARS = int(os.getenv("PDF_MAX_CHARS", "60000"))
+PDF_MIN_CHARS_PER_PAGE = int(os.getenv("PDF_MIN_CHARS_PER_PAGE", "50"))
+
+_pool = None
+_pending = 0
+# Pools replaced after a timeout, waiting to be killed
+_retired = set()
+
+pdf_extraction_stats = {"submitted": 0, "completed": 0, "failed": 0, "timed_out": 0, "rejected": 0,
+                        "truncated": 0, "pools_retired": 0, "total_ms": 0.0}
+tier_stats = {}
+
+
+# ---- worker side: runs inside a pool process, keep free of app imports ----
+
+
+def _fast_pages(source):
+    import pypdfium2 as pdfium
+
+    pdf = pdfium.PdfDocument(source)
+    try:
+        for index in range(min(len(pdf), PDF_MAX_PAGES)):
+            page = pdf[index]
+            textpage = page.get_textpage()
+            try:
+                yield textpage.get_text_bounded().replace("\r\n", "\n").replace("\r", "\n")
+            finally:
+                textpage.close()
+                page.close()
+    finally:
+        pdf.close()
+
+
+def _layout_pages(source):
+    import pdfplumber
+
+    with pdfplumber.open(io.BytesIO(source) if isinstance(source, bytes) else source) as pdf:
+        for page in pdf.pages[:PDF_MAX_PAGES]:
+            yield page.extract_text() or ""
+            page.close()
+
+
+def _collect(pages):
+    """Joins page texts up to PDF_MAX_CHARS. Returns (text, pages_read, truncated)."""
+    parts, chars, pages_read = [], 0, 0
+    for page_text in pages:
+        pages_read += 1
+        if not page_text.strip():
+            continue
+        if chars + len(page_text) > PDF_MAX_CHARS:
+            parts.append(page_text[:PDF_MAX_CHARS - chars])
+            return "".join(part + "\n" for part in parts), pages_read, True
+        parts.append(page_text)
+        chars += len(page_text)
+    return "".join(part + "\n" for part in parts), pages_read, False
+
+
+def _extract_text(source) -> dict:
+    timings = {}
+    started = time.perf_counter()
+    try:
+        text, pages_read, truncated = _collect(_fast_pages(source))
+    except Exception:
+        # pdfium could not read it; let pdfplumber have a go (and raise if it can't either)
+        text, pages_read, truncated = "", 0, False
+    timings["fast"] = (time.perf_counter() - started) * 1000
+
+    tier = "fast"
+    if len(text.strip()) < PDF_MIN_CHARS_PER_PAGE * max(pages_read, 1):
+        tier = "layout"
+        started = time.perf_counter()
+        text, pages_read, truncated = _collect(_layout_pages(source))
+        timings["layout"] = (time.perf_counter() - started) * 1000
+
+    return {"text": text, "tier": tier, "timings": timings, "truncated": truncated}
+
+
+# ---- API side ----
+
+
+def _record(result: dict):
+    for tier, ms in result["timings"].items():
+        stats = tier_stats.setdefault(tier, {"runs": 0, "selected": 0, "total_ms": 0.0, "max_ms": 0.0})
+        stats["runs"] += 1
+        stats["total_ms"] += ms
+        stats["max_ms"] = max(stats["max_ms"], ms)
+    tier_stats[result["tier"]]["selected"] += 1
+    if result["truncated"]:
+        pdf_extraction_stats["truncated"] += 1
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # spawn: forking a process that already runs an event loop and threads is unsafe
+        _pool = ProcessPoolExecutor(max_workers=PDF_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+def _kill_workers(pool: ProcessPoolExecutor):
+    if sys.version_info >= (3, 14):
+        # Kills every worker and shuts the pool down
+        pool.kill_workers()
+        return
+    # Older Pythons have no public way to stop a running task, so this reaches
+    # into the executor's private process table; if that ever goes away the
+    # hung worker is left to finish on its own
+    if not hasattr(pool, "_processes"):
+        print("[pdf_extraction] cannot kill workers of a retired pool; leaving them to finish")
+    # None once the pool has been shut down
+    for process in list((getattr(pool, "_processes", None) or {}).values()):
+        if process.is_alive():
+            process.kill()
+    pool.shutdown(wait=False)
+
+
+def _kill_pool(pool: ProcessPoolExecutor):
+    _retired.discard(pool)
+    _kill_workers(pool)
+
+
+def _retire_pool(pool: ProcessPoolExecutor):
+    global _pool
+    if pool in _retired:
+        return
+    if _pool is pool:
+        _pool = None
+    _retired.add(pool)
+    pdf_extraction_stats["pools_retired"] += 1
+    # Documents already running there get their full timeout before the kill
+    asyncio.get_running_loop().call_later(PDF_EXTRACT_TIMEOUT_SECONDS, _kill_pool, pool)
+
+
+def _release(_future):
+    global _pending
+    _pending -= 1
+
+
+async def extract_pdf_text(source) -> str:
+    """
+    Extracts the text of a PDF in the process pool. `source` is the PDF bytes
+    or a path to it; paths keep large uploads from being pickled to the worker.
+    Raises 503 when the pool is saturated, 504 on timeout and 400 for unreadable PDFs.
+    """
+    global _pending, _pool
+    if _pending >= PDF_MAX_PENDING:
+        pdf_extraction_stats["rejected"] += 1
+        raise HTTPException(
+            status_code=503,
+            detail="PDF extraction is busy, please retry shortly",
+            headers={"Retry-After": "2"},
+        )
+
+    loop = asyncio.get_running_loop()
+    pool = _get_pool()
+    try:
+        future = pool.submit(_extract_text, source)
+    except BrokenProcessPool:
+        # A worker died (e.g. OOM on a hostile PDF); start a fresh pool
+        _pool = None
+        pool = _get_pool()
+        future = pool.submit(_extract_text, source)
+
+    _pending += 1
+    pdf_extraction_stats["submitted"] += 1
+    future.add_done_callback(lambda f: loop.call_soon_threadsafe(_release, f))
+
+    started = time.monotonic()
+    try:
+        # shield: cancelling the wrapper must not drop the pending-slot accounting
+        wrapped = asyncio.wrap_future(future)
+        result = await asyncio.wait_for(asyncio.shield(wrapped), PDF_EXTRACT_TIMEOUT_SECONDS)
+    except BrokenProcessPool:
+        pdf_extraction_stats["failed"] += 1
+        shutdown_pdf_pool()
+        raise HTTPException(status_code=503, detail="PDF extraction worker crashed, please retry",
+                            headers={"Retry-After": "2"})
+    except asyncio.TimeoutError:
+        pdf_extraction_stats["timed_out"] += 1
+        # Nobody awaits the result any more; consume it so it is not logged as unretrieved
+        wrapped.add_done_callback(lambda f: f.cancelled() or f.exception())
+        if not future.cancel():
+            # Already running in a worker: that process has to go
+            _retire_pool(pool)
+        raise HTTPException(status_code=504, detail="PDF extraction timed out")
+    except Exception as e:
+        pdf_extraction_stats["failed"] += 1
+        raise HTTPException(status_code=400, detail=f"Error parsing PDF: {str(e)}")
+
+    pdf_extraction_stats["completed"] += 1
+    pdf_extraction_stats["total_ms"] += (time.monotonic() - started) * 1000
+    _record(result)
+    return result["text"]
+
+
+def shutdown_pdf_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+    for pool in list(_retired):
+        _kill_pool(pool)
+
+
+def get_pdf_extraction_stats():
+    completed = pdf_extraction_stats["completed"]
+    return {
+        **{k: v for k, v in pdf_extraction_stats.items() if k != "total_ms"},
+        "pending": _pending,
+        "max_pending": PDF_MAX_PENDING,
+        "workers": PDF_WORKERS,
+        "avg_ms": round(pdf_extraction_stats["total_ms"] / completed, 1) if completed else 0.0,
+        "tiers": {
+            tier: {
+                "runs": stats["runs"],
+                "selected": stats["selected"],
+                "avg_ms": round(stats["total_ms"] / stats["runs"], 1),
+                "max_ms": round(stats["max_ms"], 1),
+            }
+            for tier, stats in tier_stats.items()
+        },
+    }
@@ -0,0 +1,155 @@
+import os
+import re
+
+
+# Deterministic, local skill-overlap scoring used to shortlist applications
+# before the Gemini fitment assessment. Skills are normalised into a shared
+# vocabulary (case, punctuation, version suffixes, common aliases) and each
+# skill set becomes an int bitmask over that vocabulary, so scoring a batch of
+# resumes against one JD is a handful of AND + popcount operations per resume.
+
+DEFAULT_PRESCORE_THRESHOLD = float(os.getenv("PRESCORE_THRESHOLD", "0"))
+
+REQUIRED_WEIGHT = 0.8
+PREFERRED_WEIGHT = 0.2
+
+SKILL_ALIASES = {
+    "js": "javascript",
+    "ecmascript": "javascript",
+    "ts": "typescript",
+    "py": "python",
+    "python3": "python",
+    "golang": "go",
+    "reactjs": "react",
+    "react.js": "react",
+    "vuejs": "vue",
+    "vue.js": "vue",
+    "angularjs": "angular",
+    "angular.js": "angular",
+    "node": "nodejs",
+    "node.js": "nodejs",
+    "express.js": "express",
+    "expressjs": "express",
+    "next.js": "nextjs",
+    "nest.js": "nestjs",
+    "postgres": "postgresql",
+    "psql": "postgresql",
+    "mongo": "mongodb",
+    "k8s": "kubernetes",
+    "cpp": "c++",
+    "c plus plus": "c++",
+    "c sharp": "c#",
+    "csharp": "c#",
+    "dotnet": ".net",
+    "asp.net core": ".net",
+    "amazon web services": "aws",
+    "google cloud platform": "gcp",
+    "google cloud": "gcp",
+    "microsoft azure": "azure",
+    "ml": "machine learning",
+    "dl": "deep learning",
+    "nlp": "natural language processing",
+    "sklearn": "scikit-learn",
+    "scikit learn": "scikit-learn",
+    "tf": "tensorflow",
+    "rest": "rest api",
+    "restful api": "rest api",
+    "restful apis": "rest api",
+    "rest apis": "rest api",
+    "ci cd": "ci/cd",
+    "cicd": "ci/cd",
+    "html5": "html",
+    "css3": "css",
+    "tailwindcss": "tailwind",
+    "tailwind css": "tailwind",
+    "gen ai": "generative ai",
+    "genai": "generative ai",
+    "llms": "llm",
+}
+
+# Trailing versions such as "Python 3.11", "Java 17", "Angular v15", "Vue 3.x"
+_VERSION_SUFFIX = re.compile(r"\s*\bv?\d+(\.\d+)*(\.x)?\+?$")
+_SEPARATORS = re.compile(r"[,;|()\[\]]")
+
+
+def normalize_skill(skill: str):
+    skill = " ".join(skill.lower().replace("_", " ").replace("-", " ").split()).strip(" :").rstrip(".")
+    if skill in SKILL_ALIASES:
+        return SKILL_ALIASES[skill]
+    skill = _VERSION_SUFFIX.sub("", skill).strip()
+    return SKILL_ALIASES.get(skill, skill) or None
+
+
+def normalize_skills(skills) -> set:
+    """Canonical skill set; compound entries like "AWS (EC2, S3)" are split."""
+    normalized = set()
+    for entry in skills or []:
+        if not entry:
+            continue
+        for part in _SEPARATORS.split(entry):
+            skill = normalize_skill(part)
+            if skill:
+                normalized.add(skill)
+    return normalized
+
+
+def resume_skills(resume: dict) -> set:
+    """All skills a resume claims: the skills list plus technologies used in experience and projects."""
+    skills = list(resume.get("skills") or [])
+    for section in ("experience", "projects"):
+        for item in resume.get(section) or []:
+            skills.extend(item.get("technologies_used") or [])
+    return normalize_skills(skills)
+
+
+class SkillVocabulary:
+    def __init__(self):
+        self.index = {}
+
+    def mask(self, skills: set) -> int:
+        bits = 0
+        for skill in skills:
+            if skill not in self.index:
+                self.index[skill] = len(self.index)
+            bits |= 1 << self.index[skill]
+        return bits
+
+    def names(self, bits: int):
+        return sorted(skill for skill, i in self.index.items() if bits >> i & 1)
+
+
+def score_resumes(job_description: dict, resumes: list) -> list:
+    """
+    Provisional 0-100 fitment scores for each resume dict against one JD dict.
+    Required-skill coverage weighs 80%, preferred-skill coverage 20% (100%
+    required when the JD lists no preferred skills).
+    """
+    vocab = SkillVocabulary()
+    required = vocab.mask(normalize_skills(job_description.get("required_skills")))
+    preferred = vocab.mask(normalize_skills(job_description.get("preferred_skills"))) & ~required
+    required_count, preferred_count = required.bit_count(), preferred.bit_count()
+
+    results = []
+    for resume in resumes:
+        candidate = vocab.mask(resume_skills(resume))
+        matched_required = candidate & required
+        matched_preferred = candidate & preferred
+
+        required_coverage = matched_required.bit_count() / required_count if required_count else 1.0
+        if preferred_count:
+            preferred_coverage = matched_preferred.bit_count() / preferred_count
+            score = 100 * (REQUIRED_WEIGHT * required_coverage + PREFERRED_WEIGHT * preferred_coverage)
+        else:
+            score = 100 * required_coverage
+
+        results.append({
+            "score": round(score, 2),
+            "matched_required": vocab.names(matched_required),
+            "missing_required": vocab.names(required & ~candidate),
+            "matched_preferred": vocab.names(matched_preferred),
+        })
+    return results
+
+
+def prescore_resume(job_description: dict, resume: dict) -> dict:
+    return score_resumes(job_description, [resume])[0]
@@ -0,0 +1,119 @@
+import json
+import math
+import os
+
+
+# Compact serialisation of the structured resume / JD context sent to Gemini.
+# Null and empty fields, Mongo bookkeeping keys and duplicate list entries are
+# dropped, JSON is emitted without whitespace, and when the context is still
+# over PROMPT_TOKEN_BUDGET the longest free-text fields are trimmed first.
+
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "6000"))
+FIELD_CHAR_CAP = int(os.getenv("PROMPT_FIELD_CHAR_CAP", "2000"))
+MIN_FIELD_CHARS = 200
+CHARS_PER_TOKEN = 4
+
+NOISE_KEYS = {"_id", "user_id", "original_filename", "raw_text", "prescore_threshold", "fitment_fingerprint"}
+
+prompt_context_stats = {}
+
+
+def estimate_tokens(text: str) -> int:
+    # Rough heuristic for Gemini's tokenizer on English/JSON text
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def _truncate(text: str, limit: int) -> str:
+    # The ellipsis counts toward the limit, so a truncated field is never longer than `limit`
+    return text if len(text) <= limit else text[:limit - 1].rstrip() + "…"
+
+
+def _prune(value):
+    if isinstance(value, dict):
+        pruned = {}
+        for key, item in value.items():
+            if key in NOISE_KEYS:
+                continue
+            item = _prune(item)
+            if item is None or item == "" or item == [] or item == {}:
+                continue
+            pruned[key] = item
+        return pruned
+    if isinstance(value, list):
+        items, seen = [], set()
+        for item in value:
+            item = _prune(item)
+            if item is None or item == "" or item == [] or item == {}:
+                continue
+            marker = item.strip().lower() if isinstance(item, str) else json.dumps(item, sort_keys=True, default=str)
+            if marker in seen:
+                continue
+            seen.add(marker)
+            items.append(item)
+        return items
+    if isinstance(value, str):
+        value = value.strip()
+        return _truncate(value, FIELD_CHAR_CAP) if value else None
+    return value
+
+
+def _string_slots(value, slots):
+    """Collects (container, key) pairs for every string leaf."""
+    items = value.items() if isinstance(value, dict) else enumerate(value) if isinstance(value, list) else []
+    for key, item in items:
+        if isinstance(item, str):
+            slots.append((value, key))
+        else:
+            _string_slots(item, slots)
+    return slots
+
+
+def _serialize(sections: dict) -> str:
+    return "\n\n".join(
+        f"{label}:\n{json.dumps(data, separators=(',', ':'), ensure_ascii=False, default=str)}"
+        for label, data in sections.items()
+    )
+
+
+def build_prompt_context(sections: dict, call_site: str, token_budget: int = None) -> str:
+    """
+    Serialises {"Label": dict, ...} into "Label:\\n<compact json>" blocks and
+    records the estimated input tokens saved against the unpruned compact JSON.
+    """
+    token_budget = token_budget or PROMPT_TOKEN_BUDGET
+    # Baseline is the same compact serialization the prompts used to send
+    # (model_dump_json), so the saving counts only pruning, dedupe and trimming
+    tokens_before = estimate_tokens(_serialize(sections))
+
+    compact = {label: _prune(data) for label, data in sections.items()}
+    text = _serialize(compact)
+
+    # Still over budget: shave the longest free-text fields until it fits
+    slots = _string_slots(compact, [])
+    while estimate_tokens(text) > token_budget and slots:
+        container, key = max(slots, key=lambda slot: len(slot[0][slot[1]]))
+        current = container[key]
+        if len(current) <= MIN_FIELD_CHARS:
+            break
+        trimmed = _truncate(current, max(MIN_FIELD_CHARS, int(len(current) * 0.7)))
+        if len(trimmed) >= len(current):
+            # No progress possible; send it over budget rather than spin
+            break
+        container[key] = trimmed
+        text = _serialize(compact)
+
+    tokens_after = estimate_tokens(text)
+    site = prompt_context_stats.setdefault(call_site, {"calls": 0, "tokens_before": 0, "tokens_after": 0, "over_budget": 0})
+    site["calls"] += 1
+    site["tokens_before"] += tokens_before
+    site["tokens_after"] += tokens_after
+    if tokens_after > token_budget:
+        site["over_budget"] += 1
+    return text
+
+
+def get_prompt_context_stats():
+    return {
+        call_site: {**site, "tokens_saved": site["tokens_before"] - site["tokens_after"]}
+        for call_site, site in prompt_context_stats.items()
+    }
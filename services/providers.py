@@ -0,0 +1,214 @@
+import asyncio
+import json
+import os
+import time
+from pathlib import Path
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from utils.fingerprint import fingerprint
+
+
+# Pluggable providers for the external AI APIs (Gemini via google-genai, TTS
+# via Sarvam). PROVIDER_MODE selects how they are reached:
+#   live    - call the real APIs (default)
+#   record  - call the real APIs and write every response, with its observed
+#             latency, to a JSON cassette under CASSETTE_DIR
+#   replay  - serve responses from CASSETTE_DIR with no network access,
+#             sleeping for the recorded latency (REPLAY_LATENCY=recorded),
+#             a fixed number of milliseconds, or scaled by REPLAY_LATENCY_SCALE
+# Cassettes are keyed by a fingerprint of the request, so replaying the same
+# flow reproduces the same responses and timings.
+
+PROVIDER_MODE = os.getenv("PROVIDER_MODE", "live").lower()
+CASSETTE_DIR = Path(os.getenv("CASSETTE_DIR", "cassettes"))
+REPLAY_LATENCY = os.getenv("REPLAY_LATENCY", "recorded")
+REPLAY_LATENCY_SCALE = float(os.getenv("REPLAY_LATENCY_SCALE", "1.0"))
+
+
+def _jsonable(value):
+    if hasattr(value, "model_dump"):
+        return value.model_dump(mode="json", exclude_none=True)
+    if isinstance(value, dict):
+        return {k: _jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(v) for v in value]
+    return value
+
+
+class CassetteResponse:
+    """Stand-in for SDK responses in replay mode; call sites only read `.text`."""
+
+    def __init__(self, text):
+        self.text = text
+
+
+class CassetteStore:
+    def __init__(self, root: Path):
+        self.root = root
+
+    def key(self, kind: str, request: dict) -> str:
+        return fingerprint(kind, _jsonable(request))
+
+    def path(self, kind: str, key: str) -> Path:
+        return self.root / kind / f"{key}.json"
+
+    def _write(self, kind: str, request: dict, entry: dict):
+        path = self.path(kind, self.key(kind, request))
+        path.parent.mkdir(parents=True, exist_ok=True)
+        entry = {"request": _jsonable(request), "recorded_at": time.time(), **entry}
+        path.write_text(json.dumps(entry, indent=2, ensure_ascii=False))
+
+    def _read(self, kind: str, request: dict) -> dict:
+        path = self.path(kind, self.key(kind, request))
+        if not path.exists():
+            raise HTTPException(status_code=502, detail=f"No recorded {kind} cassette for this request ({path.name})")
+        return json.loads(path.read_text())
+
+    # File I/O (and fingerprinting long histories) stays off the event loop
+    async def write(self, kind: str, request: dict, entry: dict):
+        await run_in_threadpool(self._write, kind, request, entry)
+
+    async def read(self, kind: str, request: dict) -> dict:
+        return await run_in_threadpool(self._read, kind, request)
+
+
+async def replay_delay(seconds: float):
+    if REPLAY_LATENCY == "recorded":
+        delay = seconds * REPLAY_LATENCY_SCALE
+    else:
+        delay = float(REPLAY_LATENCY) / 1000.0
+    if delay > 0:
+        await asyncio.sleep(delay)
+
+
+# ------------------ Gemini ------------------
+
+
+class LiveGeminiProvider:
+    def __init__(self):
+        from google import genai
+        self.client = genai.Client()
+
+    async def generate_content(self, model, contents, config=None):
+        return await self.client.aio.models.generate_content(model=model, contents=contents, config=config)
+
+    async def send_chat(self, model, history, message, config=None):
+        chat = self.client.aio.chats.create(model=model, history=history, config=config)
+        return await chat.send_message(message)
+
+    async def stream_chat(self, model, history, message, config=None):
+        chat = self.client.aio.chats.create(model=model, history=history, config=config)
+        return await chat.send_message_stream(message)
+
+
+class RecordingGeminiProvider:
+    def __init__(self, live: LiveGeminiProvider, store: CassetteStore):
+        self.live = live
+        self.store = store
+
+    async def generate_content(self, model, contents, config=None):
+        started = time.monotonic()
+        response = await self.live.generate_content(model, contents, config)
+        await self.store.write("generate_content", {"model": model, "contents": contents, "config": config},
+                               {"text": response.text, "latency": time.monotonic() - started})
+        return response
+
+    async def send_chat(self, model, history, message, config=None):
+        started = time.monotonic()
+        response = await self.live.send_chat(model, history, message, config)
+        await self.store.write("chat", {"model": model, "history": history, "message": message, "config": config},
+                               {"text": response.text, "latency": time.monotonic() - started})
+        return response
+
+    async def stream_chat(self, model, history, message, config=None):
+        request = {"model": model, "history": history, "message": message, "config": config}
+        started = time.monotonic()
+        stream = await self.live.stream_chat(model, history, message, config)
+
+        async def recorded():
+            chunks, last = [], started
+            async for chunk in stream:
+                now = time.monotonic()
+                chunks.append({"text": chunk.text, "delay": now - last})
+                last = now
+                yield chunk
+            await self.store.write("chat_stream", request, {"chunks": chunks, "latency": last - started})
+
+        return recorded()
+
+
+class ReplayGeminiProvider:
+    def __init__(self, store: CassetteStore):
+        self.store = store
+
+    async def generate_content(self, model, contents, config=None):
+        entry = await self.store.read("generate_content", {"model": model, "contents": contents, "config": config})
+        await replay_delay(entry["latency"])
+        return CassetteResponse(entry["text"])
+
+    async def send_chat(self, model, history, message, config=None):
+        entry = await self.store.read("chat", {"model": model, "history": history, "message": message, "config": config})
+        await replay_delay(entry["latency"])
+        return CassetteResponse(entry["text"])
+
+    async def stream_chat(self, model, history, message, config=None):
+        entry = await self.store.read("chat_stream", {"model": model, "history": history, "message": message, "config": config})
+
+        async def replayed():
+            for chunk in entry["chunks"]:
+                await replay_delay(chunk["delay"])
+                yield CassetteResponse(chunk["text"])
+
+        return replayed()
+
+
+# ------------------ Sarvam TTS ------------------
+
+
+class LiveSpeechProvider:
+    def __init__(self):
+        from sarvamai import SarvamAI
+        self.client = SarvamAI(api_subscription_key=os.getenv("SARVAM_API_KEY"))
+
+    async def text_to_speech(self, **kwargs):
+        # The Sarvam SDK is synchronous; keep it off the event loop
+        return await run_in_threadpool(self.client.text_to_speech.convert, **kwargs)
+
+
+class RecordingSpeechProvider:
+    def __init__(self, live: LiveSpeechProvider, store: CassetteStore):
+        self.live = live
+        self.store = store
+
+    async def text_to_speech(self, **kwargs):
+        started = time.monotonic()
+        response = await self.live.text_to_speech(**kwargs)
+        await self.store.write("tts", kwargs, {"response": response.model_dump(mode="json"),
+                                               "latency": time.monotonic() - started})
+        return response
+
+
+class ReplaySpeechProvider:
+    def __init__(self, store: CassetteStore):
+        self.store = store
+
+    async def text_to_speech(self, **kwargs):
+        from sarvamai.types import TextToSpeechResponse
+        entry = await self.store.read("tts", kwargs)
+        await replay_delay(entry["latency"])
+        return TextToSpeechResponse.model_validate(entry["response"])
+
+
+def _build_providers():
+    store = CassetteStore(CASSETTE_DIR)
+    if PROVIDER_MODE == "replay":
+        return ReplayGeminiProvider(store), ReplaySpeechProvider(store)
+    if PROVIDER_MODE == "record":
+        return (RecordingGeminiProvider(LiveGeminiProvider(), store),
+                RecordingSpeechProvider(LiveSpeechProvider(), store))
+    if PROVIDER_MODE != "live":
+        raise ValueError(f"Unknown PROVIDER_MODE {PROVIDER_MODE!r}; expected live, record or replay")
+    return LiveGeminiProvider(), LiveSpeechProvider()
+
+
+gemini_provider, speech_provider = _build_providers()
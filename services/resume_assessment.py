@@ -0,0 +1,73 @@
+import time
+from bson import ObjectId
+from fastapi import HTTPException
+from config import resumes_collection, assessments_collection
+from services.candidate_assessment import (
+    AssessmentResult,
+    JobDescription,
+    ResumeDocument,
+    assess_candidate_fitment,
+    fitment_fingerprint,
+)
+from services.fitment_cache import find_cached_assessment, record_bypass, reuse_cached_assessment
+from services.jd_cache import get_cached_jd
+from services.llm_admission import PRIORITY_DEFAULT
+
+
+async def run_candidate_assessment(
+    resume_id: str, job_id: str, force: bool = False, priority: str = PRIORITY_DEFAULT
+) -> dict:
+    """
+    Loads the resume and JD, scores the pair (reusing a cached assessment unless
+    `force`) and stores the result. Shared by POST /api/resume/assess-candidate
+    and the apply-time background assessment; raises HTTPException like a handler.
+    """
+    resume_data = await resumes_collection.find_one({"_id": ObjectId(resume_id)})
+    if not resume_data:
+        raise HTTPException(status_code=404, detail="Resume not found")
+
+    job_data = await get_cached_jd(job_id)
+    if not job_data:
+        raise HTTPException(status_code=404, detail="Job description not found")
+
+    # Remove MongoDB internal fields not part of Pydantic models
+    for key in ["_id", "original_filename", "raw_text"]:
+        resume_data.pop(key, None)
+        job_data.pop(key, None)
+
+    resume_doc = ResumeDocument(**resume_data)
+    job_doc = JobDescription(**job_data)
+
+    # Reuse a recent assessment of the identical resume/JD pair unless forced
+    fitment_fp = fitment_fingerprint(job_doc, resume_doc)
+    if force:
+        record_bypass()
+    else:
+        cached = await find_cached_assessment(fitment_fp)
+        if cached:
+            cached = await reuse_cached_assessment(cached, resume_id, job_id)
+            return {
+                "message": "Assessment completed",
+                "assessment_id": str(cached["_id"]),
+                "assessment": AssessmentResult.model_validate(cached).model_dump(),
+                "cached": True,
+            }
+
+    assessment = await assess_candidate_fitment(job_doc, resume_doc, priority=priority)
+
+    # Prepare assessment dict for DB insertion
+    assessment_data = assessment.model_dump()
+    assessment_data["resume_id"] = resume_id
+    assessment_data["job_id"] = job_id
+    assessment_data["job_description"] = job_doc.model_dump()
+    assessment_data["fitment_fingerprint"] = fitment_fp
+    assessment_data["created_at"] = time.time()
+
+    result = await assessments_collection.insert_one(assessment_data)
+
+    return {
+        "message": "Assessment completed",
+        "assessment_id": str(result.inserted_id),
+        "assessment": assessment.model_dump(),
+        "cached": False,
+    }
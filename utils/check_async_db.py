@@ -0,0 +1,111 @@
+"""
+Flags MongoDB calls that would block (or silently not run) on the event loop.
+
+Every collection in config.py comes from pymongo's AsyncMongoClient, so their
+I/O methods return coroutines and must be awaited. This walks the source tree
+and reports:
+  - collection I/O methods called without `await`
+  - collection methods handed to run_in_threadpool / run_in_executor
+  - sync pymongo.MongoClient usage
+
+Run from the project root:  python -m utils.check_async_db [paths...]
+Exits non-zero when anything is found.
+"""
+import ast
+import sys
+from pathlib import Path
+
+
+AWAITABLE_METHODS = {
+    "find_one", "insert_one", "insert_many", "update_one", "update_many",
+    "replace_one", "delete_one", "delete_many", "count_documents",
+    "estimated_document_count", "distinct", "bulk_write", "aggregate", "watch",
+    "find_one_and_update", "find_one_and_replace", "find_one_and_delete",
+    "create_index", "create_indexes", "drop_index", "list_indexes", "to_list",
+}
+THREADPOOL_CALLS = {"run_in_threadpool", "run_in_executor"}
+SKIP_DIRS = {".venv", "venv", "__pycache__", ".git"}
+
+
+def _is_collection(node) -> bool:
+    """`x_collection`, `obj.x_collection`, `db.<name>` or `db["name"]`."""
+    if isinstance(node, ast.Name):
+        return node.id.endswith("_collection")
+    if isinstance(node, ast.Attribute):
+        return node.attr.endswith("_collection") or (isinstance(node.value, ast.Name) and node.value.id == "db")
+    if isinstance(node, ast.Subscript):
+        return isinstance(node.value, ast.Name) and node.value.id == "db"
+    return False
+
+
+def _is_collection_io(node) -> bool:
+    if not (isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute)):
+        return False
+    if node.func.attr not in AWAITABLE_METHODS:
+        return False
+    target = node.func.value
+    # find(...).to_list() / aggregate cursors: look through the chained call
+    if node.func.attr == "to_list" and isinstance(target, ast.Call) and isinstance(target.func, ast.Attribute):
+        target = target.func.value
+    return _is_collection(target)
+
+
+class SyncMongoVisitor(ast.NodeVisitor):
+    def __init__(self, path):
+        self.path = path
+        self.awaited = set()
+        self.findings = []
+
+    def report(self, node, message):
+        self.findings.append(f"{self.path}:{node.lineno}: {message}")
+
+    def visit_Await(self, node):
+        self.awaited.add(id(node.value))
+        self.generic_visit(node)
+
+    def visit_Call(self, node):
+        if _is_collection_io(node) and id(node) not in self.awaited:
+            self.report(node, f"{ast.unparse(node.func)}() is not awaited")
+
+        func_name = node.func.attr if isinstance(node.func, ast.Attribute) else getattr(node.func, "id", None)
+        if func_name in THREADPOOL_CALLS:
+            for arg in node.args:
+                if isinstance(arg, ast.Attribute) and _is_collection(arg.value):
+                    self.report(node, f"{ast.unparse(arg)} runs in a thread pool; await the async collection instead")
+                elif isinstance(arg, ast.Lambda) and any(_is_collection_io(n) for n in ast.walk(arg.body)):
+                    self.report(node, "collection call wrapped in a thread pool lambda")
+
+        if func_name == "MongoClient":
+            self.report(node, "sync pymongo.MongoClient; use AsyncMongoClient from config.py")
+        self.generic_visit(node)
+
+
+def check_file(path: Path):
+    visitor = SyncMongoVisitor(path)
+    visitor.visit(ast.parse(path.read_text(), filename=str(path)))
+    return visitor.findings
+
+
+def iter_sources(roots):
+    for root in roots:
+        root = Path(root)
+        if root.is_file():
+            yield root
+            continue
+        for path in sorted(root.rglob("*.py")):
+            if not SKIP_DIRS.intersection(path.parts):
+                yield path
+
+
+def main(argv):
+    findings = []
+    for path in iter_sources(argv or ["."]):
+        findings.extend(check_file(path))
+    for finding in findings:
+        print(finding)
+    print(f"{len(findings)} blocking MongoDB call(s) found")
+    return 1 if findings else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
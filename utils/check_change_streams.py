@@ -0,0 +1,106 @@
+"""
+End-to-end check of the application events hub (services/application_events.py)
+against a real MongoDB replica set. A single-node one is enough:
+
+    mongod --replSet rs0 --dbpath /tmp/rs0 &
+    mongosh --eval 'rs.initiate()'
+    MONGO_URI='mongodb://localhost:27017/?replicaSet=rs0&directConnection=true' \\
+        python -m utils.check_change_streams
+
+Works in a scratch database (dropped afterwards) and verifies live fan-out,
+Last-Event-ID replay, the snapshot fallback for unknown ids, and resuming the
+shared stream from its resume token after a restart. Exits 0 when every step
+passes, 1 on a failure and 2 when the server is not a replica set.
+"""
+import asyncio
+import os
+import sys
+import time
+
+# Never touch application data; set before config is imported
+os.environ["MONGO_DB_NAME"] = os.getenv("CHANGE_STREAM_CHECK_DB", "interview_platform_change_stream_check")
+
+from bson import ObjectId
+from config import applications_collection, close_mongo, connect_mongo, db
+from services.application_events import ApplicationEventHub, ChangeStreamsUnavailable
+
+EVENT_TIMEOUT_SECONDS = 10
+
+
+async def _next_event(subscriber) -> tuple:
+    while True:
+        item = await asyncio.wait_for(subscriber.queue.get(), EVENT_TIMEOUT_SECONDS)
+        if item is not None:
+            return item
+
+
+async def _run_checks() -> list:
+    results = []
+
+    def check(name, ok, detail=""):
+        results.append((name, bool(ok), detail))
+
+    hub = ApplicationEventHub()
+    job_id, user_id = ObjectId(), ObjectId()
+    await hub.ensure_started()
+    try:
+        live = hub.subscribe({"job_id": str(job_id)})
+        inserted = await applications_collection.insert_one(
+            {"job_id": job_id, "user_id": user_id, "status": "pending", "application_date": time.time()}
+        )
+        application_id = inserted.inserted_id
+        # Change for another job in between: the subscriber must not see it
+        await applications_collection.insert_one({"job_id": ObjectId(), "user_id": user_id, "status": "other"})
+        await applications_collection.update_one({"_id": application_id}, {"$set": {"status": "resume_assessed"}})
+
+        first_token, first = await _next_event(live)
+        second_token, second = await _next_event(live)
+        check("insert delivered", first["status"] == "pending" and first["application_id"] == str(application_id), first)
+        check("other jobs filtered out", second["application_id"] == str(application_id), second)
+        check("update delivered", second["status"] == "resume_assessed", second)
+
+        replay = hub.subscribe({"application_id": str(application_id)}, last_event_id=first_token)
+        token, event = await _next_event(replay)
+        check("Last-Event-ID replay", token == second_token and event["status"] == "resume_assessed")
+
+        unknown = hub.subscribe({"application_id": str(application_id)}, last_event_id="not-a-token")
+        snapshot = await hub.snapshot(unknown) if unknown.lagged else {"applications": []}
+        check("unknown id falls back to snapshot",
+              [a["status"] for a in snapshot["applications"]] == ["resume_assessed"] and snapshot["token"] == second_token,
+              snapshot)
+
+        # Restart the shared stream; the write in between must arrive via resume_after
+        await hub.stop()
+        await applications_collection.update_one({"_id": application_id}, {"$set": {"status": "interview_scheduled"}})
+        await hub.ensure_started()
+        _, event = await _next_event(live)
+        check("stream resumes from its token", event["status"] == "interview_scheduled", event)
+    finally:
+        await hub.stop()
+    return results
+
+
+async def _main() -> int:
+    try:
+        hello = await connect_mongo().admin.command("hello")
+        if not hello.get("setName"):
+            print("MongoDB is not a replica set; see the instructions at the top of utils/check_change_streams.py")
+            return 2
+        try:
+            results = await _run_checks()
+        except ChangeStreamsUnavailable as e:
+            print(f"Change streams unavailable: {e}")
+            return 2
+        except asyncio.TimeoutError:
+            results = [("events arrived", False, f"nothing within {EVENT_TIMEOUT_SECONDS}s")]
+        finally:
+            await connect_mongo().drop_database(db.name)
+        for name, ok, detail in results:
+            print(f"{'PASS' if ok else 'FAIL'}  {name}" + ("" if ok or not detail else f"  {detail}"))
+        return 0 if all(ok for _, ok, _ in results) else 1
+    finally:
+        await close_mongo()
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(_main()))
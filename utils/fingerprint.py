@@ -0,0 +1,20 @@
+import hashlib
+import json
+
+
+def fingerprint(*parts) -> str:
+    """
+    Stable sha256 hex digest over strings, bytes and JSON-serialisable values.
+    Dicts are serialised with sorted keys so logically equal inputs hash equally.
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, bytes):
+            data = part
+        elif isinstance(part, str):
+            data = part.encode("utf-8")
+        else:
+            data = json.dumps(part, sort_keys=True, separators=(",", ":"), default=str).encode("utf-8")
+        digest.update(len(data).to_bytes(8, "big"))
+        digest.update(data)
+    return digest.hexdigest()
@@ -0,0 +1,225 @@
+"""
+Declarative MongoDB index registry.
+
+INDEXES lists every index the app's query paths rely on; apply_indexes()
+creates whatever is missing and is safe to run repeatedly (it runs at startup
+unless MONGO_AUTO_INDEX=false). QUERY_SHAPES are the hot queries those indexes
+exist for; check_query_plans() explains each one and fails if any still
+resolves to a COLLSCAN.
+
+    python -m utils.indexes apply    # create missing indexes
+    python -m utils.indexes status   # present / missing / building / conflicting
+    python -m utils.indexes check    # explain QUERY_SHAPES, exit 1 on COLLSCAN
+
+In CI run `apply` before `check`: queries against a collection that does not
+exist yet explain as EOF and would pass trivially.
+"""
+import asyncio
+import os
+import sys
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+from config import (
+    db,
+    mongo_client,
+    close_mongo,
+    users_collection,
+    jds_collection,
+    applications_collection,
+    interviews_collection,
+    assessments_collection,
+    interview_assessments_collection,
+    resume_parse_cache_collection,
+    resume_ingest_jobs_collection,
+)
+
+
+AUTO_INDEX = os.getenv("MONGO_AUTO_INDEX", "true").lower() == "true"
+
+INDEXES = [
+    (users_collection, [
+        IndexModel([("email", ASCENDING)], unique=True),
+    ]),
+    (applications_collection, [
+        # One application per candidate per job
+        IndexModel([("user_id", ASCENDING), ("job_id", ASCENDING)], unique=True),
+        # Keyset pages (utils/pagination.py) of get_applicants_for_job / my_applications
+        IndexModel([("job_id", ASCENDING), ("_id", ASCENDING)]),
+        IndexModel([("user_id", ASCENDING), ("_id", ASCENDING)]),
+    ]),
+    (jds_collection, [
+        # jobs_created_by_user pages
+        IndexModel([("user_id", ASCENDING), ("_id", ASCENDING)]),
+    ]),
+    (interviews_collection, [
+        # get_all_scheduled_interviews?user_id= pages
+        IndexModel([("user_id", ASCENDING), ("_id", ASCENDING)]),
+    ]),
+    (interview_assessments_collection, [
+        # newest interview assessment per application (applicant dashboard $lookup)
+        IndexModel([("application_id", ASCENDING), ("created_at", DESCENDING)]),
+    ]),
+    (assessments_collection, [
+        # fitment cache: newest assessment for a fingerprint
+        IndexModel([("fitment_fingerprint", ASCENDING), ("created_at", DESCENDING)]),
+    ]),
+    (resume_parse_cache_collection, [
+        # invalidate_resume_parse_cache deletes by prompt version
+        IndexModel([("prompt_version", ASCENDING)]),
+    ]),
+    (resume_ingest_jobs_collection, [
+        # mark_stale_ingest_jobs at startup
+        IndexModel([("status", ASCENDING), ("updated_at", ASCENDING)]),
+    ]),
+]
+
+_sample_id = ObjectId()
+
+# (collection, filter, sort) for every hot query; values only need the right type
+QUERY_SHAPES = [
+    (users_collection, {"email": "someone@example.com"}, None),
+    (applications_collection, {"job_id": _sample_id, "_id": {"$gt": _sample_id}}, [("_id", ASCENDING)]),
+    (applications_collection, {"user_id": _sample_id, "_id": {"$gt": _sample_id}}, [("_id", ASCENDING)]),
+    (applications_collection, {"user_id": _sample_id, "job_id": _sample_id}, None),
+    (jds_collection, {"user_id": _sample_id, "_id": {"$gt": _sample_id}}, [("_id", ASCENDING)]),
+    (jds_collection, {"_id": {"$gt": _sample_id}}, [("_id", ASCENDING)]),
+    (interviews_collection, {"user_id": str(_sample_id), "_id": {"$gt": _sample_id}}, [("_id", ASCENDING)]),
+    (interview_assessments_collection, {"application_id": _sample_id}, [("created_at", DESCENDING)]),
+    (assessments_collection, {"fitment_fingerprint": "0" * 64}, [("created_at", DESCENDING)]),
+    (resume_parse_cache_collection, {"prompt_version": {"$ne": "0" * 16}}, None),
+    (resume_ingest_jobs_collection, {"status": "running", "updated_at": {"$lt": 0.0}}, None),
+]
+
+
+def _index_name(model: IndexModel) -> str:
+    return model.document["name"]
+
+
+async def apply_indexes() -> list:
+    """
+    Creates every registered index that is missing. Returns one result dict per
+    index; failures (e.g. duplicates blocking a unique index) are reported, not raised.
+    """
+    results = []
+    for collection, models in INDEXES:
+        existing = {index["name"] async for index in await collection.list_indexes()}
+        for model in models:
+            name = _index_name(model)
+            result = {"collection": collection.name, "index": name}
+            if name in existing:
+                result["status"] = "exists"
+            else:
+                try:
+                    await collection.create_indexes([model])
+                    result["status"] = "created"
+                except OperationFailure as e:
+                    result["status"] = "failed"
+                    result["error"] = e.details.get("errmsg", str(e)) if e.details else str(e)
+            results.append(result)
+    return results
+
+
+async def _builds_in_progress() -> set:
+    """(collection, index) pairs currently being built; empty if $currentOp is not permitted."""
+    building = set()
+    try:
+        cursor = await mongo_client.admin.aggregate([
+            {"$currentOp": {"allUsers": True}},
+            {"$match": {"command.createIndexes": {"$exists": True}, "ns": {"$regex": f"^{db.name}\\."}}},
+        ])
+        async for op in cursor:
+            for spec in op["command"].get("indexes", []):
+                building.add((op["command"]["createIndexes"], spec.get("name")))
+    except OperationFailure:
+        pass
+    return building
+
+
+async def index_status() -> list:
+    building = await _builds_in_progress()
+    results = []
+    for collection, models in INDEXES:
+        existing = {index["name"]: index async for index in await collection.list_indexes()}
+        for model in models:
+            name = _index_name(model)
+            wanted = model.document
+            result = {"collection": collection.name, "index": name}
+            if (collection.name, name) in building:
+                result["status"] = "building"
+            elif name not in existing:
+                result["status"] = "missing"
+            elif bool(existing[name].get("unique")) != bool(wanted.get("unique")):
+                result["status"] = "conflict"
+            else:
+                result["status"] = "present"
+            results.append(result)
+    return results
+
+
+def _stages(plan: dict):
+    yield plan.get("stage")
+    for key in ("inputStage", "queryPlan"):
+        if key in plan:
+            yield from _stages(plan[key])
+    for child in plan.get("inputStages", []):
+        yield from _stages(child)
+
+
+async def check_query_plans() -> list:
+    """Explains every QUERY_SHAPES entry; returns the ones whose winning plan contains a COLLSCAN."""
+    collscans = []
+    for collection, query, sort in QUERY_SHAPES:
+        cursor = collection.find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        plan = (await cursor.explain())["queryPlanner"]["winningPlan"]
+        stages = [stage for stage in _stages(plan) if stage]
+        if "COLLSCAN" in stages:
+            collscans.append({"collection": collection.name, "query": query, "sort": sort, "stages": stages})
+    return collscans
+
+
+async def ensure_indexes():
+    """Startup hook: applies the registry and logs anything that did not build."""
+    if not AUTO_INDEX:
+        return
+    try:
+        results = await apply_indexes()
+    except Exception as e:
+        print(f"[indexes] could not apply index registry: {e}")
+        return
+    created = [r["index"] for r in results if r["status"] == "created"]
+    if created:
+        print(f"[indexes] created: {', '.join(created)}")
+    for r in results:
+        if r["status"] == "failed":
+            print(f"[indexes] {r['collection']}.{r['index']} failed: {r['error']}")
+
+
+async def _main(command: str) -> int:
+    try:
+        if command == "apply":
+            results = await apply_indexes()
+            for r in results:
+                print(f"{r['collection']:<24} {r['index']:<32} {r['status']}" + (f"  {r['error']}" if r.get("error") else ""))
+            return 1 if any(r["status"] == "failed" for r in results) else 0
+        if command == "status":
+            results = await index_status()
+            for r in results:
+                print(f"{r['collection']:<24} {r['index']:<32} {r['status']}")
+            return 0 if all(r["status"] == "present" for r in results) else 1
+        if command == "check":
+            collscans = await check_query_plans()
+            for c in collscans:
+                print(f"COLLSCAN {c['collection']} {c['query']} sort={c['sort']} plan={' <- '.join(c['stages'])}")
+            print(f"{len(QUERY_SHAPES) - len(collscans)}/{len(QUERY_SHAPES)} registered queries use an index")
+            return 1 if collscans else 0
+    finally:
+        await close_mongo()
+    print(__doc__)
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(_main(sys.argv[1] if len(sys.argv) > 1 else "")))
@@ -0,0 +1,97 @@
+from collections import Counter
+from pymongo import monitoring
+
+
+# Connection pool counters for this worker's MongoDB client, one entry per
+# server address. Fed by the driver's CMAP events (see config.connect_mongo);
+# utilization is checked-out connections over maxPoolSize, and the checkout
+# wait is how long requests queued for a connection.
+
+class PoolMetricsListener(monitoring.ConnectionPoolListener):
+    def __init__(self):
+        self.pools = {}
+        # PoolCreatedEvent.options only lists non-default options; the client's
+        # effective maxPoolSize is set here by config.connect_mongo
+        self.max_pool_size = None
+
+    def _pool(self, address):
+        key = f"{address[0]}:{address[1]}"
+        pool = self.pools.get(key)
+        if pool is None:
+            pool = self.pools[key] = {
+                "max_pool_size": None,
+                "open": 0,
+                "checked_out": 0,
+                "peak_checked_out": 0,
+                "checkouts": 0,
+                "checkout_wait_total_ms": 0.0,
+                "checkout_wait_max_ms": 0.0,
+                "checkout_failures": Counter(),
+                "cleared": 0,
+            }
+        return pool
+
+    def pool_created(self, event):
+        self._pool(event.address)["max_pool_size"] = event.options.get("maxPoolSize", self.max_pool_size)
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self._pool(event.address)["cleared"] += 1
+
+    def pool_closed(self, event):
+        self.pools.pop(f"{event.address[0]}:{event.address[1]}", None)
+
+    def connection_created(self, event):
+        self._pool(event.address)["open"] += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self._pool(event.address)["open"] -= 1
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        pool = self._pool(event.address)
+        pool["checkout_failures"][event.reason] += 1
+        self._record_wait(pool, event.duration)
+
+    def connection_checked_out(self, event):
+        pool = self._pool(event.address)
+        pool["checkouts"] += 1
+        pool["checked_out"] += 1
+        pool["peak_checked_out"] = max(pool["peak_checked_out"], pool["checked_out"])
+        self._record_wait(pool, event.duration)
+
+    def connection_checked_in(self, event):
+        self._pool(event.address)["checked_out"] -= 1
+
+    @staticmethod
+    def _record_wait(pool, duration):
+        wait_ms = (duration or 0.0) * 1000
+        pool["checkout_wait_total_ms"] += wait_ms
+        pool["checkout_wait_max_ms"] = max(pool["checkout_wait_max_ms"], wait_ms)
+
+
+pool_listener = PoolMetricsListener()
+
+
+def get_mongo_pool_stats():
+    stats = {}
+    for address, pool in pool_listener.pools.items():
+        attempts = pool["checkouts"] + sum(pool["checkout_failures"].values())
+        max_size = pool["max_pool_size"] or pool_listener.max_pool_size
+        stats[address] = {
+            **pool,
+            "max_pool_size": max_size,
+            "checkout_failures": dict(pool["checkout_failures"]),
+            "checkout_wait_total_ms": round(pool["checkout_wait_total_ms"], 2),
+            "checkout_wait_max_ms": round(pool["checkout_wait_max_ms"], 2),
+            "checkout_wait_avg_ms": round(pool["checkout_wait_total_ms"] / attempts, 3) if attempts else 0.0,
+            "utilization": round(pool["checked_out"] / max_size, 4) if max_size else None,
+        }
+    return stats
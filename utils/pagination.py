@@ -0,0 +1,68 @@
+import json
+import os
+from typing import Literal, Optional
+from bson import ObjectId
+from fastapi import HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from pymongo import ASCENDING
+from config import list_reads
+
+
+# Keyset pagination for list endpoints. Pages are ordered by _id and the next
+# page starts strictly after the last _id returned, so every page is an index
+# range scan no matter how deep the client goes. The response body stays a
+# plain list; the cursor for the next page comes back in NEXT_CURSOR_HEADER
+# and is absent on the last page. Without `limit` everything after `after` is
+# returned in one response, as these endpoints always did, so clients that
+# never read the header still get every row. format=ndjson streams every
+# document after `after` as newline-delimited JSON straight off the Mongo
+# cursor (exports).
+# Reads go through config.list_reads (MONGO_LIST_READ_PREFERENCE).
+
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", "1000"))
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class PageParams:
+    def __init__(
+        self,
+        limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Page size (json format only); omit for all results"),
+        after: Optional[str] = Query(None, description=f"Cursor from the previous page's {NEXT_CURSOR_HEADER} header"),
+        format: Literal["json", "ndjson"] = Query("json", description="ndjson streams all results for export"),
+    ):
+        if after is not None and not ObjectId.is_valid(after):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        self.limit = limit
+        self.after = ObjectId(after) if after else None
+        self.format = format
+
+
+async def _ndjson(cursor, serialize):
+    try:
+        async for doc in cursor:
+            yield json.dumps(serialize(doc), default=str) + "\n"
+    finally:
+        await cursor.close()
+
+
+async def paginate(collection, query: dict, projection, page: PageParams, response: Response, serialize):
+    """
+    Runs `query` as a keyset page (or an NDJSON stream) ordered by _id and
+    returns the documents mapped through `serialize`.
+    """
+    if page.after:
+        query = {**query, "_id": {"$gt": page.after}}
+    cursor = list_reads(collection).find(query, projection).sort("_id", ASCENDING)
+
+    if page.format == "ndjson":
+        return StreamingResponse(_ndjson(cursor, serialize), media_type="application/x-ndjson")
+
+    if page.limit is None:
+        return [serialize(doc) for doc in await cursor.to_list()]
+
+    # One extra document tells us whether another page exists
+    docs = await cursor.limit(page.limit + 1).to_list()
+    if len(docs) > page.limit:
+        docs = docs[:page.limit]
+        response.headers[NEXT_CURSOR_HEADER] = str(docs[-1]["_id"])
+    return [serialize(doc) for doc in docs]
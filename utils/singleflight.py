@@ -0,0 +1,47 @@
+import asyncio
+
+
+# Every SingleFlight group registers itself here so /api/metrics can report
+# how many calls each one collapsed.
+singleflight_groups = {}
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key: the first caller starts the
+    work, later callers with the same key await the same task instead of
+    starting their own. The key is forgotten once the task finishes, so this
+    only deduplicates in-flight work, it never caches results.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._in_flight = {}
+        self.stats = {"calls": 0, "executions": 0, "collapsed": 0}
+        singleflight_groups[name] = self
+
+    def _forget(self, key, task):
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+
+    async def do(self, key: str, fn):
+        """Runs `fn()` (a coroutine factory) once per in-flight `key`."""
+        self.stats["calls"] += 1
+        task = self._in_flight.get(key)
+        if task is None:
+            self.stats["executions"] += 1
+            task = asyncio.ensure_future(fn())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda t: self._forget(key, t))
+        else:
+            self.stats["collapsed"] += 1
+
+        # Shield so one caller disconnecting does not cancel the shared call
+        return await asyncio.shield(task)
+
+
+def get_singleflight_stats():
+    return {
+        name: {**group.stats, "in_flight": len(group._in_flight)}
+        for name, group in singleflight_groups.items()
+    }
@@ -0,0 +1,133 @@
+import os
+import tempfile
+from contextlib import asynccontextmanager
+from fastapi import HTTPException, UploadFile
+
+
+# Resume/JD uploads are copied out of the request in fixed-size chunks instead
+# of one `await file.read()`. The first chunk must carry the %PDF- signature,
+# and uploads larger than UPLOAD_SPOOL_BYTES go to a temp file whose path is
+# handed to PDF extraction, so large PDFs never sit in worker memory.
+#
+# Starlette receives and spools the whole multipart body before a handler
+# runs, so the size checks in checked_chunks() only apply after the fact.
+# UploadSizeLimitMiddleware is what stops oversized uploads from being
+# received: it rejects on Content-Length before the first body chunk is read,
+# and cuts off bodies without one as soon as they cross the limit.
+
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(10 * 1024 * 1024)))
+UPLOAD_SPOOL_BYTES = int(os.getenv("UPLOAD_SPOOL_BYTES", str(1024 * 1024)))
+UPLOAD_CHUNK_BYTES = 64 * 1024
+
+# Allowance for multipart boundaries, part headers and small form fields
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+PDF_MAGIC = b"%PDF-"
+ZIP_MAGIC = b"PK\x03\x04"
+
+
+def _too_large(max_bytes):
+    return HTTPException(status_code=413, detail=f"File too large; the limit is {max_bytes} bytes")
+
+
+class UploadSizeLimitMiddleware:
+    """
+    ASGI middleware capping request bodies of upload routes. `limits` maps a
+    path to its file limit in bytes; the body may exceed it by
+    MULTIPART_OVERHEAD_BYTES. Raises 413 from receive(), i.e. while FastAPI
+    parses the form, so the error goes through the normal exception handling.
+    """
+
+    def __init__(self, app, limits: dict):
+        self.app = app
+        self.limits = limits
+
+    async def __call__(self, scope, receive, send):
+        max_bytes = self.limits.get(scope["path"]) if scope["type"] == "http" else None
+        if max_bytes is None:
+            await self.app(scope, receive, send)
+            return
+
+        max_body = max_bytes + MULTIPART_OVERHEAD_BYTES
+        declared = dict(scope["headers"]).get(b"content-length", b"")
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            # Before the first read: nothing (not even 100-continue) has been sent to the client yet
+            if declared.isdigit() and int(declared) > max_body:
+                raise _too_large(max_bytes)
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > max_body:
+                    raise _too_large(max_bytes)
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+def is_pdf(head: bytes) -> bool:
+    return head.startswith(PDF_MAGIC)
+
+
+async def checked_chunks(file: UploadFile, max_bytes: int = None, magic: bytes = PDF_MAGIC, kind: str = "PDF"):
+    """
+    Yields the upload in chunks, enforcing `max_bytes` (413) and the leading
+    `magic` bytes (400). The body has already been received by this point;
+    see UploadSizeLimitMiddleware for the early rejection.
+    """
+    max_bytes = max_bytes or MAX_UPLOAD_BYTES
+    if file.size is not None and file.size > max_bytes:
+        raise _too_large(max_bytes)
+
+    size = 0
+    while chunk := await file.read(UPLOAD_CHUNK_BYTES):
+        if size == 0 and not chunk.startswith(magic):
+            raise HTTPException(status_code=400, detail=f"{file.filename} is not a {kind} file")
+        size += len(chunk)
+        if size > max_bytes:
+            raise _too_large(max_bytes)
+        yield chunk
+    if size == 0:
+        raise HTTPException(status_code=400, detail=f"{file.filename} is empty")
+
+
+async def save_upload(file: UploadFile, path: str, max_bytes: int = None, magic: bytes = PDF_MAGIC, kind: str = "PDF"):
+    """Streams the upload into `path` with the same checks as checked_chunks()."""
+    with open(path, "wb") as out:
+        async for chunk in checked_chunks(file, max_bytes, magic, kind):
+            out.write(chunk)
+
+
+@asynccontextmanager
+async def spooled_pdf_upload(file: UploadFile):
+    """
+    Yields the uploaded PDF as bytes (small files) or as a temp-file path
+    (files past UPLOAD_SPOOL_BYTES); the temp file is removed on exit.
+    """
+    chunks = []
+    spool = None
+    size = 0
+    try:
+        async for chunk in checked_chunks(file):
+            size += len(chunk)
+            if spool is None and size > UPLOAD_SPOOL_BYTES:
+                spool = tempfile.NamedTemporaryFile(prefix="upload-", suffix=".pdf", delete=False)
+                spool.writelines(chunks)
+                chunks = None
+            if spool is not None:
+                spool.write(chunk)
+            else:
+                chunks.append(chunk)
+
+        if spool is not None:
+            spool.close()
+            yield spool.name
+        else:
+            data, chunks = b"".join(chunks), None
+            yield data
+    finally:
+        if spool is not None:
+            spool.close()
+            os.unlink(spool.name)